@@ -0,0 +1,64 @@
+""" Check that bytecode emission scales linearly with program size.
+
+Run from the repository root:
+
+    python -m benchmarks.emission
+
+The same instruction mix is assembled at growing sizes. If emission is
+linear, the time per instruction stays flat; the script exits with a non-zero
+status when the largest program costs noticeably more per instruction than
+the smallest one.
+"""
+import sys
+import time
+
+from morty.Preprocessor import Preprocessor
+
+
+SIZES = (10_000, 40_000, 160_000)
+TOLERANCE = 2.0
+
+BODY = (
+    'put 1 a',
+    'add a 2 b',
+    'con "x" b c',
+    'outl c',
+    'jmpt b loop',
+)
+
+
+def program(size):
+    code = ['loop:']
+    while len(code) < size:
+        code.extend(BODY)
+    return code[:size]
+
+
+def measure(size):
+    code = program(size)
+    pre = Preprocessor()
+    start = time.perf_counter()
+    pre.process(code)
+    elapsed = time.perf_counter() - start
+    assert not pre.err, pre.err
+    return elapsed
+
+
+def main():
+    per_line = []
+    for size in SIZES:
+        elapsed = min(measure(size) for _ in range(3))
+        per_line.append(elapsed / size)
+        print(f'{size:>8} lines  {elapsed * 1000:9.2f} ms  '
+              f'{elapsed / size * 1e6:6.2f} us/line')
+
+    ratio = per_line[-1] / per_line[0]
+    print(f'per-line cost ratio (largest / smallest): {ratio:.2f}')
+    if ratio > TOLERANCE:
+        print('emission does not scale linearly')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
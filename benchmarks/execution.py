@@ -0,0 +1,95 @@
+""" Measure how assembler optimizations change executed instructions.
+
+Run from the repository root:
+
+    python -m benchmarks.execution
+
+Each workload is assembled with increasingly aggressive options and run on
+the reference interpreter; the table shows bytecode size, executed
+instructions and interpreter time.
+"""
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+import time
+
+from morty import build
+from morty.Machine import Machine
+
+
+""" Workloads as (name, source lines or path, stdin lines). """
+LOOP = (
+    'put 0 i',
+    'put 0 sum',
+    'loop:',
+    'add i 1 i',
+    'mul i 2 twice',
+    'add sum twice sum',
+    'lth i 100000 more',
+    'jmpt more loop',
+    'outl sum',
+)
+
+""" LOOP reading its temporary right after assigning it, as in
+`put a b; put b c`. """
+TEMPORARIES = (
+    'put 0 i',
+    'put 0 sum',
+    'loop:',
+    'add i 1 i',
+    'mul i 2 twice',
+    'add twice sum sum',
+    'lth i 100000 more',
+    'jmpt more loop',
+    'outl sum',
+)
+
+WORKLOADS = (
+    ('year_of_birth', Path('examples/exe/year_of_birth.so'), ['12']),
+    ('loop', LOOP, []),
+    ('temporaries', TEMPORARIES, []),
+)
+
+OPTIONS = (
+    ('plain', {}),
+    ('-O', dict(optimized=True)),
+    ('-O shake reuse', dict(optimized=True, shake=True, reuse_slots=True)),
+)
+
+
+def source_path(tmp, name, source):
+    if isinstance(source, Path):
+        return str(source)
+    path = Path(tmp, f'{name}.so')
+    path.write_text('\n'.join(source) + '\n')
+    return str(path)
+
+
+def main():
+    print(f'{"workload":<14} {"options":<15} {"bytes":>7} '
+          f'{"executed":>10} {"run ms":>8}')
+    with TemporaryDirectory() as tmp:
+        for name, source, stdin in WORKLOADS:
+            source = source_path(tmp, name, source)
+            for label, options in OPTIONS:
+                target = Path(tmp, f'{name}.rk')
+                report = build.assemble(source, target, **options)
+                if report.err:
+                    print(f'{name}: {report.err}', file=sys.stderr)
+                    return 1
+
+                image = target.read_bytes()
+                machine = Machine(image, stdin=stdin)
+                start = time.perf_counter()
+                machine.run()
+                elapsed = time.perf_counter() - start
+                if machine.err:
+                    print(f'{name}: {machine.err}', file=sys.stderr)
+                    return 1
+                print(f'{name:<14} {label:<15} {len(image):>7} '
+                      f'{machine.steps():>10,} {elapsed * 1000:>8.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+""" Generate synthetic SmallO programs for benchmarks.
+
+Run from the repository root to write a program to a directory:
+
+    python -m benchmarks.generate OUT_DIR --lines 100000 --include-depth 3
+
+Programs are valid SmallO: every jump goes to a label that exists, and every
+operand has a type the Preprocessor accepts. The shape is controlled by the
+number of lines, the depth of the include chain, the share of lines that are
+labels, and the share of literals that are strings rather than integers.
+Output is deterministic for a given seed.
+"""
+import argparse
+from pathlib import Path
+import random
+import sys
+
+
+VARIABLES = 64
+INTEGER_OPCODES = ('add', 'sub', 'mul', 'div', 'mod',
+                   'gth', 'lth', 'geq', 'leq', 'eq', 'neq')
+
+
+class Generator:
+    """ Generator writes one program as a chain of included files. """
+    def __init__(self, lines=10_000, include_depth=0, label_density=0.05,
+                 string_ratio=0.3, seed=0):
+        self.lines = lines
+        self.include_depth = include_depth
+        self.label_density = label_density
+        self.string_ratio = string_ratio
+        self.rng = random.Random(seed)
+        self.labels = []
+
+    def write(self, directory):
+        """ Write the program into `directory` and return the main file. """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        files = self.include_depth + 1
+        per_file = self.lines // files
+        bodies = [self._body(index, per_file if index else
+                             self.lines - per_file * (files - 1))
+                  for index in range(files)]
+
+        # Jumps are generated before every label is known, so targets are
+        # drawn once all files exist; this keeps forward jumps in the mix.
+        paths = []
+        for index, body in enumerate(bodies):
+            path = directory / f'part{index}.so'
+            if index + 1 < files:
+                body.insert(0, f'>"part{index + 1}.so"')
+            path.write_text('\n'.join(self._resolve(body)) + '\n')
+            paths.append(path)
+        return paths[0]
+
+    def _body(self, index, size):
+        body = [f'  jump part{index}_start', f'part{index}_start:']
+        self.labels.append(f'part{index}_start')
+        while len(body) < size:
+            if self.rng.random() < self.label_density:
+                label = f'part{index}_l{len(self.labels)}'
+                self.labels.append(label)
+                body.append(f'{label}:')
+            elif self.rng.random() < 0.05:
+                body.append(f'@ comment {len(body)}')
+            else:
+                body.append('  ' + self._instruction())
+        return body
+
+    def _resolve(self, body):
+        for line in body:
+            if '\0' in line:
+                line = line.replace('\0', self.rng.choice(self.labels))
+            yield line
+
+    def _instruction(self):
+        kind = self.rng.random()
+        if kind < 0.45:
+            opcode = self.rng.choice(INTEGER_OPCODES)
+            return (f'{opcode} {self._integer()} {self._integer(nonzero=True)}'
+                    f' {self._variable()}')
+        if kind < 0.6:
+            return f'put {self._value()} {self._variable()}'
+        if kind < 0.7:
+            return f'con {self._value()} {self._value()} {self._variable()}'
+        if kind < 0.8:
+            return f'out {self._value()}'
+        if kind < 0.85:
+            return f'not {self._value()} {self._variable()}'
+        if kind < 0.95:
+            opcode = self.rng.choice(('jmpt', 'jmpf', 'brt', 'brf'))
+            return f'{opcode} {self._variable()} \0'
+        return self.rng.choice(('jump \0', 'br \0', 'nl', 'back'))
+
+    def _variable(self):
+        return f'v{self.rng.randrange(VARIABLES)}'
+
+    def _integer(self, nonzero=False):
+        if self.rng.random() < 0.5:
+            return self._variable()
+        value = self.rng.randint(-1000, 1000)
+        return str(value or 1) if nonzero else str(value)
+
+    def _value(self):
+        if self.rng.random() < self.string_ratio:
+            return f'"s{self.rng.randrange(1000)}"'
+        return self._integer()
+
+
+def add_arguments(parser):
+    parser.add_argument('--lines', type=int, default=10_000)
+    parser.add_argument('--include-depth', type=int, default=0)
+    parser.add_argument('--label-density', type=float, default=0.05)
+    parser.add_argument('--string-ratio', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def from_arguments(args):
+    return Generator(lines=args.lines, include_depth=args.include_depth,
+                     label_density=args.label_density,
+                     string_ratio=args.string_ratio, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    print(from_arguments(args).write(args.directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
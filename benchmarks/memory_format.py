@@ -0,0 +1,61 @@
+""" Compare the JSON and binary memory section encodings.
+
+Run from the repository root:
+
+    python -m benchmarks.memory_format
+
+Memory tables are generated with the mix the Preprocessor produces: mostly
+variables (null), plus integer and string literals and label addresses.
+"""
+import random
+import sys
+import time
+
+from morty import make
+from morty import read
+
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def table(size, seed=0):
+    rng = random.Random(seed)
+    space = []
+    for _ in range(size):
+        kind = rng.random()
+        if kind < 0.5:
+            space.append(None)
+        elif kind < 0.8:
+            space.append(rng.randint(-2 ** 31, 2 ** 31 - 1))
+        else:
+            space.append(f'literal string {rng.randint(0, 10 ** 6)}')
+    return space
+
+
+def best(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    print(f'{"entries":>9} {"format":>7} {"size":>11} '
+          f'{"encode ms":>10} {"decode ms":>10}')
+    for size in SIZES:
+        space = table(size)
+        for name, encode, decode in (
+                ('json', make.mem, read.mem),
+                ('binary', make.mem_bin, read.mem_bin)):
+            encode_time, data = best(encode, *space)
+            decode_time, (decoded, _) = best(decode, data, 0)
+            assert decoded == space
+            print(f'{size:>9} {name:>7} {len(data):>11,} '
+                  f'{encode_time * 1000:>10.1f} {decode_time * 1000:>10.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
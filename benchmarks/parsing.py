@@ -0,0 +1,49 @@
+""" Compare the regex Lexer against the reference Parser state machine.
+
+Run from the repository root:
+
+    python -m benchmarks.parsing
+"""
+import sys
+import time
+
+from morty.Lexer import Lexer
+from morty.Parser import Parser
+
+
+LINES = (
+    'put 1 a',
+    'add counter 1 counter',
+    'con "Hello, " name greeting',
+    r'outl "He said: \"I love SmallO\"\n"',
+    'jmpf condition_was_false loop_exit',
+    'sub -2020 year_of_birth age',
+    'back',
+)
+REPEAT = 20_000
+
+
+def measure(parser):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for line in LINES:
+            instruction = parser()
+            instruction.parse(line)
+    return time.perf_counter() - start
+
+
+def main():
+    lines = REPEAT * len(LINES)
+    results = {}
+    for parser in (Parser, Lexer):
+        elapsed = min(measure(parser) for _ in range(3))
+        results[parser.__name__] = elapsed
+        print(f'{parser.__name__:>8}  {elapsed * 1000:9.2f} ms  '
+              f'{lines / elapsed:12,.0f} lines/s')
+
+    print(f'speedup: {results["Parser"] / results["Lexer"]:.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+""" Measure throughput and peak memory of each assembler stage.
+
+Run from the repository root:
+
+    python -m benchmarks.stages --lines 100000 --output results.json
+    python -m benchmarks.stages --lines 100000 --baseline results.json
+
+A synthetic program (see benchmarks.generate) is pushed through the loader,
+the parsers, the preprocessor and the bytecode writer. Every stage is timed
+without tracing, then run once more under tracemalloc to record its peak
+allocation. Results are printed and optionally saved as JSON; with a
+baseline, the change in lines/s against it is reported and the script exits
+with a non-zero status when a stage got slower than the allowed regression.
+"""
+import argparse
+import json
+import platform
+import sys
+from tempfile import TemporaryDirectory
+import time
+import tracemalloc
+
+from morty.Loader import Loader
+from morty.Lexer import Lexer
+from morty.Parser import Parser
+from morty.ParseCache import ParseCache
+from morty.Preprocessor import Preprocessor
+from morty import make
+
+from . import generate
+
+
+def stages(source, target):
+    """ Return the number of lines and the (name, setup) pairs of stages.
+
+    Calling setup returns the callable to measure. Setup runs outside of the
+    measurement, so every stage sees the output of the previous one without
+    paying for it.
+    """
+    loader = Loader()
+    loader.load(source)
+    assert not loader.err, loader.err
+    code = loader.code
+    instructions = [line for line in code if line[-1] != ':']
+
+    pre = Preprocessor(cache=ParseCache())
+    pre.process(code)
+    assert not pre.err, pre.err
+
+    def load():
+        return lambda: Loader().load(source)
+
+    def parse(parser):
+        def run():
+            for line in instructions:
+                parser().parse(line)
+        return lambda: run
+
+    def preprocess():
+        return lambda: Preprocessor(cache=ParseCache()).process(code)
+
+    def write():
+        return lambda: make.write(
+            code=make.code(mem=make.mem(*pre.memory),
+                           ins=pre.instructions.getvalue()),
+            path=target)
+
+    return len(code), [
+        ('load', load),
+        ('parse', parse(Parser)),
+        ('lex', parse(Lexer)),
+        ('preprocess', preprocess),
+        ('make', write),
+    ]
+
+
+def measure(setup, repeat):
+    seconds = []
+    for _ in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    run = setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak
+
+
+def compare(results, baseline, max_regression):
+    failed = []
+    for name, stage in results['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            continue
+        change = stage['lines_per_sec'] / before['lines_per_sec'] - 1
+        print(f'{name:>10}  {change:+7.1%} lines/s  '
+              f'{stage["peak_bytes"] - before["peak_bytes"]:+,} peak bytes')
+        if max_regression is not None and -change > max_regression:
+            failed.append(name)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    generate.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--baseline', help='compare with this JSON file')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='fail when lines/s drops by more than this '
+                             'fraction of the baseline, e.g. 0.1')
+    args = parser.parse_args(argv)
+
+    results = {
+        'config': {key: getattr(args, key) for key in
+                   ('lines', 'include_depth', 'label_density',
+                    'string_ratio', 'seed', 'repeat')},
+        'python': platform.python_version(),
+        'stages': {},
+    }
+
+    with TemporaryDirectory() as tmp:
+        main_file = generate.from_arguments(args).write(tmp)
+        lines, pipeline = stages(main_file, f'{tmp}/out.rk')
+        print(f'{"stage":>10} {"lines/s":>12} {"ms":>9} {"peak KiB":>10}')
+        for name, setup in pipeline:
+            seconds, peak = measure(setup, args.repeat)
+            results['stages'][name] = {
+                'lines': lines,
+                'seconds': seconds,
+                'lines_per_sec': lines / seconds,
+                'peak_bytes': peak,
+            }
+            print(f'{name:>10} {lines / seconds:>12,.0f} '
+                  f'{seconds * 1000:>9.1f} {peak / 1024:>10,.0f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failed = compare(results, json.load(file), args.max_regression)
+        if failed:
+            print(f'regressed: {", ".join(failed)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+""" Guard the startup cost of the morty command.
+
+Run from the repository root:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget 40
+
+A single source is assembled several times through the morty entry point
+with `-X importtime`, after a first run that caches bytecode. The script
+prints the import time of the fastest run and the top-level imports that
+cost most, and exits with a non-zero status when imports exceed the budget
+in milliseconds or when a module that only errors or other commands need
+shows up on the success path.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+
+
+SOURCE = 'examples/exe/year_of_birth.so'
+RUNS = 5
+
+""" Modules the common success path must not import. Hashing is needed
+once MORTY_CACHE_DIR turns the disk cache on. """
+FORBIDDEN = ('click', 'colorama', 'termcolor', 'concurrent.futures.process',
+             'hashlib')
+CACHING = 'hashlib'
+
+
+def imports(target):
+    """ Run morty once; return {module: (self us, cumulative us)}. """
+    # Installed packages import from cached bytecode, so measure with it.
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    run = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'morty.launch',
+         SOURCE, '--target', target],
+        env=env, capture_output=True, text=True, check=True)
+
+    found = {}
+    for line in run.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        # One space separates the columns; more spaces indent nested imports.
+        found[name[1:].rstrip()] = int(own), int(cumulative)
+    return found
+
+
+def top_level(found):
+    return {name: cumulative for name, (_, cumulative) in found.items()
+            if not name.startswith(' ')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='maximum import time in milliseconds')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args(argv)
+
+    with TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, 'out.rk')
+        imports(target)
+        runs = [imports(target) for _ in range(args.runs)]
+
+    # The fastest run is the one least disturbed by the rest of the machine.
+    best = min(runs, key=lambda found: sum(top_level(found).values()))
+    modules = top_level(best)
+    total = sum(modules.values()) / 1000
+    print(f'imports: {total:.1f} ms (budget {args.budget:.1f} ms)')
+    for name, cumulative in sorted(modules.items(),
+                                   key=lambda item: -item[1])[:10]:
+        print(f'  {cumulative / 1000:7.1f} ms  {name}')
+
+    names = {name.strip() for name in best}
+    caching = bool(os.environ.get('MORTY_CACHE_DIR'))
+    forbidden = [name for name in FORBIDDEN if name in names
+                 and not (caching and name == CACHING)]
+    if forbidden:
+        print(f'imported on the success path: {", ".join(forbidden)}')
+    if forbidden or total > args.budget:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import json
+import struct
+
+
+""" An archive starts with its magic and version byte and holds bytecode
+images back to back. A JSON index mapping every name to the offset and size
+of its image follows them, and a trailer gives the offset of the index. """
+ARCHIVE_MAGIC = b'RkA'
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct('>3sB')
+ARCHIVE_TRAILER = struct.Struct('>Q3s')
+
+
+class Archive:
+    """ Archive writes many bytecode images into a single file.
+
+    Images are written as they are added, so only the index is held in
+    memory. The index is written when the archive is closed.
+    """
+    def __init__(self, path):
+        self.index = {}
+        self._file = open(path, 'wb')
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, name, image):
+        """ Append `image` as `name`; return its (offset, size). """
+        if name in self.index:
+            raise ValueError(f'{name} is already in the archive')
+        entry = self.index[name] = self._file.tell(), len(image)
+        self._file.write(image)
+        return entry
+
+    def close(self):
+        if self._file.closed:
+            return
+        offset = self._file.tell()
+        self._file.write(json.dumps(self.index).encode())
+        self._file.write(ARCHIVE_TRAILER.pack(offset, ARCHIVE_MAGIC))
+        self._file.close()
+
+
+def index(buf):
+    """ Return {name: (offset, size)} for the archive in `buf`. """
+    if buf[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+        raise ValueError('not a Morty archive: magic missing')
+    _, version = ARCHIVE_HEADER.unpack_from(buf)
+    if version != ARCHIVE_VERSION:
+        raise ValueError(f'unsupported archive version {version}')
+    if len(buf) < ARCHIVE_HEADER.size + ARCHIVE_TRAILER.size:
+        raise ValueError('archive is truncated')
+
+    end = len(buf) - ARCHIVE_TRAILER.size
+    offset, magic = ARCHIVE_TRAILER.unpack_from(buf, end)
+    if magic != ARCHIVE_MAGIC or not ARCHIVE_HEADER.size <= offset <= end:
+        raise ValueError('archive is truncated')
+    return {name: tuple(entry)
+            for name, entry in json.loads(buf[offset:end]).items()}
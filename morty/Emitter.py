@@ -0,0 +1,37 @@
+class Emitter:
+    """ Emitter accumulates bytecode in a growable buffer.
+
+    Appending is amortised constant time, so the cost of emitting a program
+    grows linearly with its size. The length of the emitter is the offset at
+    which the next instruction will be placed, which is what labels record.
+    """
+    def __init__(self):
+        self._buf = bytearray()
+
+    def __len__(self):
+        return len(self._buf)
+
+    def __bytes__(self):
+        return bytes(self._buf)
+
+    def __eq__(self, other):
+        if isinstance(other, Emitter):
+            return self._buf == other._buf
+        return self._buf == other
+
+    def __repr__(self):
+        return f'Emitter({bytes(self._buf)!r})'
+
+    def emit(self, *bts):
+        for each in bts:
+            self._buf += each
+
+    def offset(self):
+        return len(self._buf)
+
+    def truncate(self, offset):
+        """ Drop everything emitted after `offset`. """
+        del self._buf[offset:]
+
+    def getvalue(self):
+        return bytes(self._buf)
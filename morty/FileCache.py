@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from . import __version__
+from .ParseCache import ParseCache
+
+
+""" Modules deciding how lines are cleaned and parsed, and so what an entry
+holds. Entries are keyed by their source as well as by the version, so any
+change to them makes old entries unreachable even without a version bump. """
+FORMAT_MODULES = ('FileCache.py', 'Loader.py', 'Lexer.py', 'Parser.py')
+
+
+class FileCache:
+    """ FileCache keeps cleaned lines and parses of source files on disk.
+
+    Entries are keyed by a hash of the raw file contents and stored under a
+    directory named after the Morty version and the cache format, so any
+    edit to a file, or to the way Morty cleans and parses it, makes the old
+    entry unreachable.
+
+    Parses of the entries it loads are kept in `parsed` and handed out by
+    parse(), which falls back to `parse_cache` for other lines. Unlike
+    `parse_cache`, `parsed` is not bounded: the Loader reads every file of
+    a program before the Preprocessor parses any line, so an LRU evicts the
+    loaded parses of large programs before they are used.
+    """
+    _format = None
+
+    def __init__(self, root=None, parse_cache=None):
+        self.root = Path(root or self.default_root()) / \
+            f'v{__version__}-{self.format()}'
+        self.parse_cache = \
+            parse_cache if parse_cache is not None else ParseCache.shared()
+        self.parsed = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def default_root():
+        if os.environ.get('MORTY_CACHE_DIR'):
+            return os.environ['MORTY_CACHE_DIR']
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+        return Path(base) / 'morty'
+
+    @classmethod
+    def format(cls):
+        """ Return a short hash of the modules in FORMAT_MODULES. """
+        if cls._format is None:
+            digest = hashlib.sha256()
+            for name in FORMAT_MODULES:
+                digest.update((Path(__file__).parent / name).read_bytes())
+            cls._format = digest.hexdigest()[:12]
+        return cls._format
+
+    @staticmethod
+    def key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def load(self, data):
+        """ Return cached lines for `data`, or None if there is no entry. """
+        try:
+            with open(self._path(data)) as file:
+                entry = json.load(file)
+            lines, parsed = entry['lines'], entry['parsed']
+            loaded = {}
+            for line, result in zip(lines, parsed):
+                if result is not None:
+                    opcode, operand = result
+                    loaded[line] = opcode, tuple(map(tuple, operand))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+
+        for line, result in loaded.items():
+            self.parsed.setdefault(line, result)
+        self.hits += 1
+        return lines
+
+    def parse(self, line):
+        """ Parse `line` like ParseCache.parse, preferring loaded parses. """
+        result = self.parsed.get(line)
+        if result is None:
+            return self.parse_cache.parse(line)
+        return result
+
+    def store(self, data, lines):
+        parsed = [
+            self.parse_cache.parse(line) if self._is_instruction(line)
+            else None
+            for line in lines
+        ]
+
+        path = self._path(data)
+        temp = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp, 'w') as file:
+                json.dump({'lines': lines, 'parsed': parsed}, file)
+            os.replace(temp, path)
+        except OSError:
+            pass
+
+    def _path(self, data):
+        key = self.key(data)
+        return self.root / key[:2] / f'{key}.json'
+
+    @staticmethod
+    def _is_instruction(line):
+        return line[0] != '>' and line[-1] != ':'
@@ -0,0 +1,90 @@
+import re
+
+from .Parser import State
+
+
+""" Token patterns follow the OPCODE, INTEGER, STRING and IDENTIFIER rules in
+GRAMMAR, relaxed where the reference Parser is more lenient: integers may have
+leading zeros, identifiers may use Unicode letters, and a quote preceded by a
+backslash never closes a string. As with the Parser, a ';' outside of a string
+ends the instruction. """
+OPCODE = re.compile(r'[a-z]+(?=[\s;]|\Z)')
+
+TOKEN = re.compile(r'''
+    \s*
+    (?:
+        (?P<end>;|\Z)
+      | "(?P<string>(?:[^"]|(?<=\\)")*)(?<!\\)"
+      | (?P<integer>-?\d+)(?=[\s;]|\Z)
+      | (?P<identifier>[^\W\d]\w*)(?=[\s;]|\Z)
+    )
+''', re.VERBOSE)
+
+ESCAPE_SEQUENCES = (
+    (r'\n', '\n'),
+    (r'\t', '\t'),
+    (r'\r', '\r'),
+    (r'\"', '"'),
+)
+
+
+def lex(instruction):
+    """ Tokenize an instruction into (opcode, operand), or None on error. """
+    match = OPCODE.match(instruction)
+    if match is None:
+        return None
+
+    opcode = match.group()
+    operand = []
+    pos = match.end()
+    token = TOKEN.match
+
+    while True:
+        match = token(instruction, pos)
+        if match is None:
+            return None
+
+        kind = match.lastgroup
+        if kind == 'end':
+            return opcode, tuple(operand)
+
+        value = match.group(kind)
+        if kind == 'identifier':
+            operand.append((State.IDENTIFIER, value))
+        elif kind == 'integer':
+            operand.append((State.INTEGER, int(value)))
+        else:
+            operand.append((State.STRING, _unescape(value)))
+
+        pos = match.end()
+
+
+def _unescape(value):
+    if '\\' not in value:
+        return value
+
+    for esc, seq in ESCAPE_SEQUENCES:
+        value = value.replace(esc, seq)
+    return value
+
+
+class Lexer:
+    """ Lexer is a drop-in replacement for the Parser built on lex().
+
+    It matches whole tokens with a compiled regular expression instead of
+    stepping through the Parser's state machine one character at a time.
+    """
+    def __init__(self):
+        self.opcode = ''
+        self.operand = ()
+        self._err = False
+
+    def parse(self, instruction):
+        result = lex(instruction)
+        if result is None:
+            self._err = True
+        else:
+            self.opcode, self.operand = result
+
+    def err(self):
+        return self._err
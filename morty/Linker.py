@@ -0,0 +1,93 @@
+from .Emitter import Emitter
+from .Op import Op
+from .make import SLOT
+
+
+class Linker:
+    """ Linker merges object files into a single program.
+
+    Objects are placed the way the Loader splices sources: the first object
+    comes first, each include is replaced by the object of the included file
+    the first time it is met, and objects nobody includes follow in order.
+    Memory slots are numbered in order of first use across the placed
+    sections, so linking the objects of a program yields the same image as
+    assembling its source. The result is held in the same attributes as the
+    Preprocessor holds it, so build.emit can write either.
+    """
+    def __init__(self):
+        self.memory = []
+        self.instructions = Emitter()
+        self.literals = {}
+        self.labels = set()
+        self.err = ''
+        self._placed = set()
+
+    def link(self, objects):
+        available = {}
+        for obj in objects:
+            if obj.source in available:
+                self.err = f'{obj.source} is linked twice'
+                return
+            available[obj.source] = obj
+
+        for obj in objects:
+            self._place(obj, available)
+            if self.err:
+                return
+        self.instructions.emit(Op.END)
+
+    def _place(self, obj, available):
+        if obj.source in self._placed:
+            return
+        self._placed.add(obj.source)
+
+        for index, section in enumerate(obj.sections):
+            self._add_section(obj, section)
+            if self.err or index == len(obj.includes):
+                return
+
+            included = available.get(obj.includes[index])
+            if included is None:
+                self.err = (f'unresolved include {obj.includes[index]} '
+                            f'in {obj.source}')
+                return
+            self._place(included, available)
+            if self.err:
+                return
+
+    def _add_section(self, obj, section):
+        literals, memory = self.literals, self.memory
+        encoded = []
+        moved = False
+        for local, (symbol, value) in enumerate(zip(section.symbols,
+                                                    section.memory)):
+            slot = literals.get(symbol)
+            if slot is None:
+                slot = literals[symbol] = len(memory)
+                memory.append(value)
+            moved = moved or slot != local
+            encoded.append(SLOT.pack(slot))
+
+        base = self.instructions.offset()
+        for label, offset in section.labels.items():
+            if label in self.labels:
+                self.err = f'duplicate labels detected: {label}: ' \
+                           f'in {obj.source}'
+                return
+            self.labels.add(label)
+            memory[literals[label]] = base + offset
+
+        code = section.code
+        if not moved:
+            self.instructions.emit(code)
+            return
+
+        unpack = SLOT.unpack_from
+        parts = []
+        start = 0
+        for offset in section.relocations:
+            parts.append(code[start:offset])
+            parts.append(encoded[unpack(code, offset)[0]])
+            start = offset + 4
+        parts.append(code[start:])
+        self.instructions.emit(b''.join(parts))
@@ -1,53 +1,234 @@
+from io import BytesIO, TextIOWrapper
 from pathlib import Path
+from threading import Lock
+import os
 import re
 
 from .Stack import Stack
 
 
 class Loader:
-    def __init__(self):
+    """ Loader reads a source and splices in the files it includes.
+
+    Files come from the file system unless `resolve` is given: it is called
+    with the normalised path of every file to load and returns its text, or
+    None when there is no such file. Paths then stay relative to the
+    source instead of the working directory.
+    """
+    RUN = 4096
+
+    def __init__(self, cache=None, workers=1, files=None, resolve=None):
+        self.cache = cache
+        self.workers = workers
+        self.files = files
+        self.resolve = resolve
         self.current = Stack()
         self.code = []
         self.err = ''
         self.included = set()
 
-    def load(self, src):
-        self.include(Path(src).absolute())
+        self._pool = None
+        self._prefetched = {}
+        self._prefetch_lock = Lock()
+
+    def load(self, src, text=None):
+        for run in self._stream_runs(src, text):
+            self.code.extend(run)
+
+    def stream(self, src, text=None):
+        """ Yield the cleaned lines of `src` and its includes one by one.
+
+        Files are read lazily, so only the lines of the files currently being
+        walked are held in memory. Errors stop the stream and set err. When
+        `text` is given it is used as the contents of `src`, which then only
+        serves to resolve includes and need not exist.
+        """
+        for run in self._stream_runs(src, text):
+            yield from run
 
     def include(self, path):
-        if path in self.included:
-            return
+        for run in self._walk(path):
+            self.code.extend(run)
+
+    def sections(self, src, text=None):
+        """ Split `src` at its includes without loading them.
 
+        Returns the cleaned lines between includes, one list more than there
+        are includes, and the paths of the included files.
+        """
+        path = self._path(src)
         self.included.add(path)
-        self.current.push(path)
+        if text is not None:
+            lines = self._clean(text.splitlines())
+        else:
+            lines = self._lines(path)
+            if lines is None:
+                return [], []
+
+        sections, includes = [[]], []
+        for clean_line in lines:
+            if not self._is_include(clean_line):
+                sections[-1].append(clean_line)
+            elif self._is_valid_include(clean_line):
+                includes.append(
+                    self._path(self._resolve_include(clean_line, path)))
+                sections.append([])
+            else:
+                self.err = f'invalid include {clean_line} in {path}'
+                return [], []
+        return sections, includes
+
+    def _stream_runs(self, src, text=None):
+        path = self._path(src)
+        if text is not None:
+            yield from self._walk(path, self._clean(text.splitlines()))
+            return
 
-        if not path.exists():
-            self.err = f'path {path} does not exist'
+        if self.workers <= 1 or self.resolve is not None:
+            yield from self._walk(path)
             return
 
-        if not path.is_file():
-            self.err = f'path {path} is not a file'
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._pool = ThreadPoolExecutor(self.workers)
+        try:
+            self._prefetch(path)
+            yield from self._walk(path)
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self._prefetched.clear()
+
+    def _walk(self, path, lines=None):
+        """ Yield the cleaned lines of `path` and its includes in runs.
+
+        Handing out lists of consecutive lines instead of single lines keeps
+        the cost of passing them up through nested includes per run rather
+        than per line. Runs end at includes and are at most RUN lines long.
+        `lines` stands in for the cleaned contents of `path` when given.
+        """
+        if path in self.included:
             return
 
-        for line in self._read_lines(path):
-            if self.err:
-                return
+        self.included.add(path)
+        self.current.push(path)
 
-            clean_line = self._clean_line(line)
+        if lines is None:
+            lines = self._lines(path)
+            if lines is None:
+                return
 
-            if not clean_line:
-                continue
-            elif self._is_include(clean_line):
+        run = []
+        is_include = self._is_include
+        for clean_line in lines:
+            if is_include(clean_line):
+                if run:
+                    yield run
+                    run = []
                 if self._is_valid_include(clean_line):
-                    self.include(self._include_path(clean_line))
+                    yield from self._walk(self._include_path(clean_line))
                 else:
                     self.err = f'invalid include {clean_line} in {path}'
+                if self.err:
+                    return
             else:
-                self.code.append(clean_line)
+                run.append(clean_line)
+                if len(run) >= self.RUN:
+                    yield run
+                    run = []
+        if run:
+            yield run
 
         self.current.pop()
 
-    @ staticmethod
+    def _is_missing(self, path):
+        if not path.exists():
+            self.err = f'path {path} does not exist'
+            return True
+        if not path.is_file():
+            self.err = f'path {path} is not a file'
+            return True
+        return False
+
+    def _path(self, path):
+        if self.resolve is None:
+            return Path(path).absolute()
+        return Path(os.path.normpath(path))
+
+    def _lines(self, path):
+        """ Return the cleaned lines of `path`, or None after an error. """
+        if self.resolve is not None:
+            return self._resolved_lines(path)
+        if self._is_missing(path):
+            return None
+        if self.files is not None:
+            return self._remembered_lines(path)
+        if self._pool is not None:
+            return self._prefetch(path).result()
+        if self.cache is None:
+            return self._stream_lines(path)
+        return self._clean_lines(path)
+
+    def _resolved_lines(self, path):
+        text = self.resolve(str(path))
+        if text is None:
+            self.err = f'path {path} does not exist'
+            return None
+        return self._clean(text.splitlines())
+
+    def _remembered_lines(self, path):
+        """ Return the cleaned lines of `path`, reading them into `files` once.
+
+        Keeping `files` up to date is left to its owner.
+        """
+        lines = self.files.get(path)
+        if lines is None:
+            lines = self.files[path] = self._clean_lines(path)
+        return lines
+
+    def _prefetch(self, path):
+        """ Read and clean `path` on the pool, along with its includes.
+
+        Includes are scheduled as soon as their parent file is cleaned, so
+        the whole include tree is read concurrently while the walk still
+        visits it in order.
+        """
+        with self._prefetch_lock:
+            future = self._prefetched.get(path)
+            if future is None:
+                future = self._pool.submit(self._prefetch_lines, path)
+                self._prefetched[path] = future
+        return future
+
+    def _prefetch_lines(self, path):
+        lines = self._clean_lines(path)
+        for line in lines:
+            if self._is_include(line) and self._is_valid_include(line):
+                self._prefetch(self._resolve_include(line, path))
+        return lines
+
+    def _clean_lines(self, path):
+        if self.cache is None:
+            return self._clean(self._read_lines(path))
+
+        data = path.read_bytes()
+        lines = self.cache.load(data)
+        if lines is None:
+            lines = self._clean(TextIOWrapper(BytesIO(data)).readlines())
+            self.cache.store(data, lines)
+        return lines
+
+    def _stream_lines(self, path):
+        with open(path) as file:
+            for line in file:
+                clean_line = self._clean_line(line)
+                if clean_line:
+                    yield clean_line
+
+    def _clean(self, lines):
+        return [clean for clean in map(self._clean_line, lines) if clean]
+
+    @staticmethod
     def _read_lines(src):
         with open(src) as file:
             return file.readlines()
@@ -65,6 +246,9 @@ class Loader:
         return bool(re.search('>".+"', line))
 
     def _include_path(self, line):
+        return self._path(self._resolve_include(line, self.current.peek()))
+
+    @staticmethod
+    def _resolve_include(line, current):
         path = Path(line[2:-1])
-        current = self.current.peek()
         return path if path.is_absolute() else current.parent / path
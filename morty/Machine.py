@@ -0,0 +1,261 @@
+from .Op import Op
+from . import fold
+from . import read
+
+
+""" Rick's integers wrap around as signed 32-bit values. """
+I32_MODULUS = 2 ** 32
+
+
+def wrap(x):
+    return (x - fold.I32_MIN) % I32_MODULUS + fold.I32_MIN
+
+
+class Halt(Exception):
+    """ Raised by a handler to stop the machine with an exit status. """
+    def __init__(self, status, err=''):
+        super().__init__(err)
+        self.status = status
+        self.err = err
+
+
+class Machine:
+    """ Machine is a reference interpreter for Rick bytecode.
+
+    Instructions are decoded once into a table indexed by byte offset, then
+    executed by a dispatch loop that looks handlers up by opcode. Input comes
+    from `stdin`, an iterable of lines, and output goes to `stdout`, any
+    object with a write method. `counts` maps opcode names to the number of
+    times they were executed.
+    """
+    def __init__(self, image, stdin=(), stdout=None):
+        self.memory, start = read.code(image)
+        self.stdin = iter(stdin)
+        self.stdout = stdout
+        self.output = []
+        self.stack = []
+        self.calls = []
+        self.status = None
+        self.err = ''
+        self._executed = [0] * 256
+
+        self.HANDLERS = [None] * 256
+        for op, handler in {
+            Op.END:  self._end_,
+            Op.PUSH: self._push_,
+            Op.POP:  self._pop_,
+            Op.DROP: self._drop_,
+            Op.INI:  self._ini_,
+            Op.INS:  self._ins_,
+            Op.OUT:  self._out_,
+            Op.NL:   self._nl_,
+            Op.STI:  self._sti_,
+            Op.BOOL: self._bool_,
+            Op.ADD:  self._arithmetic(lambda x, y: x + y),
+            Op.SUB:  self._arithmetic(lambda x, y: x - y),
+            Op.MUL:  self._arithmetic(lambda x, y: x * y),
+            Op.DIV:  self._division(fold.div),
+            Op.MOD:  self._division(fold.mod),
+            Op.GTH:  self._comparison(lambda x, y: x > y),
+            Op.LTH:  self._comparison(lambda x, y: x < y),
+            Op.GEQ:  self._comparison(lambda x, y: x >= y),
+            Op.LEQ:  self._comparison(lambda x, y: x <= y),
+            Op.AND:  self._comparison(lambda x, y: x and y),
+            Op.OR:   self._comparison(lambda x, y: x or y),
+            Op.NOT:  self._not_,
+            Op.EQ:   self._comparison(lambda x, y: x == y),
+            Op.NEQ:  self._comparison(lambda x, y: x != y),
+            Op.CON:  self._con_,
+            Op.JUMP: self._jump_,
+            Op.JMPT: self._conditional(self._jump_, True),
+            Op.JMPF: self._conditional(self._jump_, False),
+            Op.BR:   self._br_,
+            Op.BRT:  self._conditional(self._br_, True),
+            Op.BRF:  self._conditional(self._br_, False),
+            Op.BACK: self._back_,
+            Op.ERR:  self._err_,
+        }.items():
+            self.HANDLERS[op[0]] = handler
+
+        self.code = self._decode(image, start)
+
+    def _decode(self, image, start):
+        """ Map each instruction offset to (opcode, handler, slot, next). """
+        code = {}
+        offset, end = start, len(image)
+        while offset < end:
+            op = image[offset]
+            address = offset - start
+            if op == Op.PUSH[0] or op == Op.POP[0]:
+                slot = int.from_bytes(image[offset + 1:offset + 5], 'big')
+                offset += 5
+            else:
+                slot = None
+                offset += 1
+            code[address] = (op, self.HANDLERS[op], slot, offset - start)
+        return code
+
+    @property
+    def counts(self):
+        return {Op.name(op): count
+                for op, count in enumerate(self._executed) if count}
+
+    def steps(self):
+        return sum(self._executed)
+
+    def run(self, max_steps=None):
+        """ Execute from the first instruction until the program halts.
+
+        Returns the exit status; `err` describes a runtime error, in which
+        case the status is 1. With `max_steps` the run is cut short with an
+        error once that many instructions have executed.
+        """
+        code = self.code
+        executed = self._executed
+        budget = -1 if max_steps is None else max_steps
+        pc = 0
+        try:
+            while budget:
+                budget -= 1
+                instruction = code.get(pc)
+                if instruction is None:
+                    raise Halt(1, f'no instruction at address {pc}')
+                op, handler, slot, pc = instruction
+                if handler is None:
+                    raise Halt(1, f'unknown opcode {op:#04x}')
+                executed[op] += 1
+                pc = handler(slot, pc)
+            raise Halt(1, f'step limit of {max_steps} exceeded')
+        except Halt as halt:
+            self.status, self.err = halt.status, halt.err
+        except IndexError:
+            self.status = 1
+            self.err = f'stack underflow or bad memory slot before {pc}'
+        except TypeError:
+            self.status = 1
+            self.err = f'operand type mismatch before {pc}'
+        return self.status
+
+    def _write(self, text):
+        if self.stdout is None:
+            self.output.append(text)
+        else:
+            self.stdout.write(text)
+
+    def _read(self):
+        line = next(self.stdin, None)
+        if line is None:
+            raise Halt(1, 'input exhausted')
+        return line.rstrip('\n')
+
+    def _pop_int(self):
+        value = self.stack.pop()
+        if not isinstance(value, int):
+            raise Halt(1, f'integer expected, got {value!r}')
+        return value
+
+    """ Handler factories for families of opcodes. """
+    def _arithmetic(self, operation):
+        def handler(_, pc):
+            y, x = self._pop_int(), self._pop_int()
+            self.stack.append(wrap(operation(x, y)))
+            return pc
+        return handler
+
+    def _division(self, operation):
+        def handler(_, pc):
+            y, x = self._pop_int(), self._pop_int()
+            if y == 0:
+                raise Halt(1, 'division by zero')
+            self.stack.append(wrap(operation(x, y)))
+            return pc
+        return handler
+
+    def _comparison(self, operation):
+        def handler(_, pc):
+            y, x = self.stack.pop(), self.stack.pop()
+            self.stack.append(fold.boolean(operation(x, y)))
+            return pc
+        return handler
+
+    def _conditional(self, branch, when):
+        def handler(slot, pc):
+            condition = bool(self.stack.pop())
+            if condition == when:
+                return branch(slot, pc)
+            self.stack.pop()
+            return pc
+        return handler
+
+    """ Opcode-specific handlers. """
+    def _end_(self, _, pc):
+        raise Halt(0)
+
+    def _push_(self, slot, pc):
+        self.stack.append(self.memory[slot])
+        return pc
+
+    def _pop_(self, slot, pc):
+        self.memory[slot] = self.stack.pop()
+        return pc
+
+    def _drop_(self, _, pc):
+        self.stack.pop()
+        return pc
+
+    def _ini_(self, _, pc):
+        line = self._read()
+        try:
+            self.stack.append(wrap(int(line)))
+        except ValueError:
+            raise Halt(1, f'integer expected on input, got {line!r}')
+        return pc
+
+    def _ins_(self, _, pc):
+        self.stack.append(self._read())
+        return pc
+
+    def _out_(self, _, pc):
+        self._write(str(self.stack.pop()))
+        return pc
+
+    def _nl_(self, _, pc):
+        self._write('\n')
+        return pc
+
+    def _sti_(self, _, pc):
+        value = self.stack.pop()
+        try:
+            self.stack.append(wrap(int(value)))
+        except ValueError:
+            raise Halt(1, f'cannot convert {value!r} to integer')
+        return pc
+
+    def _bool_(self, _, pc):
+        self.stack.append(fold.boolean(self.stack.pop()))
+        return pc
+
+    def _not_(self, _, pc):
+        self.stack.append(fold.boolean(not self.stack.pop()))
+        return pc
+
+    def _con_(self, _, pc):
+        y, x = self.stack.pop(), self.stack.pop()
+        self.stack.append(f'{x}{y}')
+        return pc
+
+    def _jump_(self, _, pc):
+        return self._pop_int()
+
+    def _br_(self, _, pc):
+        target = self._pop_int()
+        self.calls.append(pc)
+        return target
+
+    def _back_(self, _, pc):
+        if not self.calls:
+            raise Halt(1, 'back without a matching branch')
+        return self.calls.pop()
+
+    def _err_(self, _, pc):
+        raise Halt(self._pop_int())
@@ -0,0 +1,152 @@
+import json
+import struct
+
+from .Op import Op
+from .make import SEP
+
+
+""" An object file starts with its magic and version byte, followed by a
+JSON header terminated by SEP. The code of every section follows the header,
+each directly followed by its relocations as unsigned 32-bit big-endian
+offsets. """
+OBJ_MAGIC = b'RkO'
+OBJ_VERSION = 1
+OBJ_HEADER = struct.Struct('>3sB')
+
+
+class Section:
+    """ Section is the code between two includes of a source file.
+
+    `symbols` names the local memory slots in order: identifiers by name and
+    literals by value, which is how the Preprocessor tells them apart too.
+    `memory` holds their initial values and `labels` the offsets of labels
+    defined in the section. `relocations` are the offsets in `code` of the
+    memory slot operands the linker has to renumber.
+    """
+    def __init__(self, symbols, memory, labels, code, relocations):
+        self.symbols = symbols
+        self.memory = memory
+        self.labels = labels
+        self.code = code
+        self.relocations = relocations
+
+    @classmethod
+    def from_preprocessor(cls, pre):
+        code = pre.instructions.getvalue()
+        return cls(
+            symbols=list(pre.literals),
+            memory=list(pre.memory),
+            labels={label: pre.memory[pre.literals[label]]
+                    for label in sorted(pre.labels)},
+            code=code,
+            relocations=relocations(code),
+        )
+
+
+class ObjectFile:
+    """ ObjectFile is one relocatable, separately assembled source file.
+
+    Includes are not spliced in: the source is split into sections at its
+    includes instead, and `includes[n]` is the normalised path of the file
+    included between sections n and n + 1.
+    """
+    def __init__(self, source, sections, includes):
+        self.source = source
+        self.sections = sections
+        self.includes = includes
+
+    def encode(self):
+        header = {
+            'source': self.source,
+            'includes': self.includes,
+            'sections': [
+                {
+                    'symbols': section.symbols,
+                    'memory': section.memory,
+                    'labels': section.labels,
+                    'code': len(section.code),
+                    'relocations': len(section.relocations),
+                }
+                for section in self.sections
+            ],
+        }
+        parts = [OBJ_HEADER.pack(OBJ_MAGIC, OBJ_VERSION),
+                 json.dumps(header).encode(), SEP]
+        for section in self.sections:
+            parts.append(section.code)
+            parts.append(struct.pack(f'>{len(section.relocations)}I',
+                                     *section.relocations))
+        return b''.join(parts)
+
+    @classmethod
+    def decode(cls, buf):
+        if buf[:len(OBJ_MAGIC)] != OBJ_MAGIC:
+            raise ValueError('not a Morty object file: magic missing')
+        _, version = OBJ_HEADER.unpack_from(buf)
+        if version != OBJ_VERSION:
+            raise ValueError(f'unsupported object file version {version}')
+
+        offset = OBJ_HEADER.size
+        end = buf.find(SEP, offset)
+        if end < 0:
+            raise ValueError('object file header is not terminated')
+        header = json.loads(buf[offset:end])
+        _check_header(header)
+        offset = end + 1
+
+        sections = []
+        for entry in header['sections']:
+            code = bytes(buf[offset:offset + entry['code']])
+            offset += entry['code']
+            count = entry['relocations']
+            if len(code) != entry['code'] or offset + 4 * count > len(buf):
+                raise ValueError('object file is truncated')
+            sections.append(Section(
+                symbols=entry['symbols'],
+                memory=entry['memory'],
+                labels=entry['labels'],
+                code=code,
+                relocations=struct.unpack_from(f'>{count}I', buf, offset),
+            ))
+            offset += 4 * count
+        return cls(header['source'], sections, header['includes'])
+
+
+def _check_header(header):
+    """ Raise ValueError unless `header` has the fields decode() reads. """
+    if not isinstance(header, dict) \
+            or not isinstance(header.get('source'), str) \
+            or not _is_list_of(header.get('includes'), str) \
+            or not _is_list_of(header.get('sections'), dict):
+        raise ValueError('object file header is malformed')
+    for entry in header['sections']:
+        if not isinstance(entry.get('symbols'), list) \
+                or not isinstance(entry.get('memory'), list) \
+                or not isinstance(entry.get('labels'), dict) \
+                or not all(map(_is_count, entry['labels'].values())) \
+                or not _is_count(entry.get('code')) \
+                or not _is_count(entry.get('relocations')):
+            raise ValueError('object file section is malformed')
+
+
+def _is_list_of(value, kind):
+    return isinstance(value, list) and all(
+        isinstance(item, kind) for item in value)
+
+
+def _is_count(value):
+    return type(value) is int and value >= 0
+
+
+def relocations(code):
+    """ Return the offsets of the memory slot operands in `code`. """
+    push, pop = Op.PUSH[0], Op.POP[0]
+    found = []
+    index = 0
+    while index < len(code):
+        if code[index] == push or code[index] == pop:
+            found.append(index + 1)
+            index += 5
+        else:
+            index += 1
+    return found
@@ -33,3 +33,11 @@ class Op:
     BRF  = b'\x1E'
     BACK = b'\x1F'
     ERR  = b'\x20'
+
+    @staticmethod
+    def name(code):
+        """ Return the name of the opcode with byte value `code`. """
+        return NAMES.get(code)
+
+
+NAMES = {value[0]: name for name, value in vars(Op).items() if name.isupper()}
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from threading import Lock
+
+from .Lexer import Lexer
+
+
+class ParseCache:
+    """ ParseCache memoizes instruction parses keyed by cleaned line text.
+
+    Results are immutable (opcode, operand) pairs, or None for lines that
+    fail to parse. The cache keeps at most `maxsize` entries and evicts the
+    least recently used one when it is full. It is safe to share between
+    threads.
+    """
+    _shared = {}
+
+    def __init__(self, parser=Lexer, maxsize=16384):
+        self.parser = parser
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def shared(cls, parser=Lexer):
+        """ Return the process-wide cache for `parser`. """
+        cache = cls._shared.get(parser)
+        if cache is None:
+            cache = cls._shared[parser] = cls(parser)
+        return cache
+
+    def parse(self, line):
+        with self._lock:
+            try:
+                result = self._entries[line]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(line)
+                return result
+
+        result = self._parse(line)
+        self.put(line, result)
+        return result
+
+    def put(self, line, result):
+        with self._lock:
+            self._entries[line] = result
+            self._entries.move_to_end(line)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _parse(self, line):
+        instruction = self.parser()
+        instruction.parse(line)
+        if instruction.err():
+            return None
+        return instruction.opcode, instruction.operand
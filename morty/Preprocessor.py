@@ -1,56 +1,83 @@
+from itertools import chain
 import re
 
-from .Parser import Parser, State
+from .Parser import State
+from .Lexer import Lexer
+from .ParseCache import ParseCache
 from .Op import Op
-from .make import i32
+from .Emitter import Emitter
+from .Template import Template
+from .fold import fold_instruction
+from .make import SLOT
+
+
+""" Operand types shared by several opcodes. """
+BINARY = (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)
+LOGICAL = (State.VALUE, State.VALUE, State.IDENTIFIER)
+CONDITIONAL = (State.IDENTIFIER, State.IDENTIFIER)
 
 
 class Preprocessor:
-    def __init__(self):
+    """ Opcode templates: the operand types each opcode accepts and the
+    bytecode it expands to, with integers standing for operand slots. """
+    OPCODES = {
+        'put':  Template((State.VALUE, State.IDENTIFIER),
+                         (Op.PUSH, 0, Op.POP, 1)),
+        'add':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.ADD, Op.POP, 2)),
+        'sub':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.SUB, Op.POP, 2)),
+        'mul':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.MUL, Op.POP, 2)),
+        'div':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.DIV, Op.POP, 2)),
+        'mod':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.MOD, Op.POP, 2)),
+        'gth':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.GTH, Op.POP, 2)),
+        'lth':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.LTH, Op.POP, 2)),
+        'geq':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.GEQ, Op.POP, 2)),
+        'leq':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.LEQ, Op.POP, 2)),
+        'eq':   Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.EQ, Op.POP, 2)),
+        'neq':  Template(BINARY, (Op.PUSH, 0, Op.PUSH, 1, Op.NEQ, Op.POP, 2)),
+        'ini':  Template((State.IDENTIFIER,), (Op.INI, Op.POP, 0)),
+        'ins':  Template((State.IDENTIFIER,), (Op.INS, Op.POP, 0)),
+        'out':  Template((State.VALUE,), (Op.PUSH, 0, Op.OUT)),
+        'outl': Template((State.VALUE,), (Op.PUSH, 0, Op.OUT, Op.NL)),
+        'nl':   Template((), (Op.NL,)),
+        'con':  Template(LOGICAL, (Op.PUSH, 0, Op.PUSH, 1, Op.CON, Op.POP, 2)),
+        'sti':  Template((State.NOT_INTEGER, State.IDENTIFIER),
+                         (Op.PUSH, 0, Op.STI, Op.POP, 1)),
+        'not':  Template((State.VALUE, State.IDENTIFIER),
+                         (Op.PUSH, 0, Op.BOOL, Op.NOT, Op.POP, 1)),
+        'and':  Template(LOGICAL, (Op.PUSH, 0, Op.BOOL, Op.PUSH, 1, Op.BOOL,
+                                   Op.AND, Op.POP, 2)),
+        'or':   Template(LOGICAL, (Op.PUSH, 0, Op.BOOL, Op.PUSH, 1, Op.BOOL,
+                                   Op.OR, Op.POP, 2)),
+        'jump': Template((State.IDENTIFIER,), (Op.PUSH, 0, Op.JUMP)),
+        'jmpt': Template(CONDITIONAL, (Op.PUSH, 1, Op.PUSH, 0, Op.JMPT)),
+        'jmpf': Template(CONDITIONAL, (Op.PUSH, 1, Op.PUSH, 0, Op.JMPF)),
+        'br':   Template((State.IDENTIFIER,), (Op.PUSH, 0, Op.BR)),
+        'brt':  Template(CONDITIONAL, (Op.PUSH, 1, Op.PUSH, 0, Op.BRT)),
+        'brf':  Template(CONDITIONAL, (Op.PUSH, 1, Op.PUSH, 0, Op.BRF)),
+        'back': Template((), (Op.BACK,)),
+        'err':  Template((State.NOT_INTEGER, State.NOT_STRING),
+                         (Op.PUSH, 0, Op.OUT, Op.PUSH, 1, Op.ERR)),
+        'end':  Template((), (Op.END,)),
+    }
+
+    def __init__(self, parser=Lexer, cache=None, fold=False):
+        self.cache = cache if cache is not None else ParseCache.shared(parser)
+        self.fold = fold
         self.memory = []
-        self.instructions = b''
+        self.instructions = Emitter()
         self.literals = {}
         self.memory_counter = 0
         self.labels = set()
         self.err = ''
-
-        self.OPCODES = {
-            'put':  (self._put_, (State.VALUE, State.IDENTIFIER)),
-            'add':  (self._add_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'sub':  (self._sub_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'mul':  (self._mul_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'div':  (self._div_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'mod':  (self._mod_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'gth':  (self._gth_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'lth':  (self._lth_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'geq':  (self._geq_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'leq':  (self._leq_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'eq':   (self._eq_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'neq':  (self._neq_, (State.NOT_STRING, State.NOT_STRING, State.IDENTIFIER)),
-            'ini':  (self._ini_, (State.IDENTIFIER,)),
-            'ins':  (self._ins_, (State.IDENTIFIER,)),
-            'out':  (self._out_, (State.VALUE,)),
-            'outl': (self._outl_, (State.VALUE,)),
-            'nl':   (self._nl_, tuple()),
-            'con':  (self._con_, (State.VALUE, State.VALUE, State.IDENTIFIER)),
-            'sti':  (self._sti_, (State.NOT_INTEGER, State.IDENTIFIER)),
-            'not':  (self._not_, (State.VALUE, State.IDENTIFIER)),
-            'and':  (self._and_, (State.VALUE, State.VALUE, State.IDENTIFIER)),
-            'or':   (self._or_, (State.VALUE, State.VALUE, State.IDENTIFIER)),
-            'jump': (self._jump_, (State.IDENTIFIER,)),
-            'jmpt': (self._jmpt_, (State.IDENTIFIER, State.IDENTIFIER)),
-            'jmpf': (self._jmpf_, (State.IDENTIFIER, State.IDENTIFIER)),
-            'br':   (self._br_, (State.IDENTIFIER,)),
-            'brt':  (self._brt_, (State.IDENTIFIER, State.IDENTIFIER)),
-            'brf':  (self._brf_, (State.IDENTIFIER, State.IDENTIFIER)),
-            'back': (self._back_, tuple()),
-            'err':  (self._err_, (State.NOT_INTEGER, State.NOT_STRING)),
-            'end':  (self._end_, tuple()),
-        }
+        self._defined = []
+        self._encoded = []
 
     def process(self, code):
-        code.append('end')
-        for line in code:
+        self.feed(chain(code, ('end',)))
+
+    def feed(self, lines):
+        """ Process `lines` without terminating the program. """
+        for line in lines:
             if self.err:
                 break
 
@@ -59,6 +86,32 @@ class Preprocessor:
             else:
                 self._check_and_add_instruction(line)
 
+    def mark(self):
+        """ Return a mark of the current state to roll back to. """
+        return len(self.memory), self.instructions.offset(), len(self._defined)
+
+    def rollback(self, mark):
+        """ Forget every line fed since `mark` was taken.
+
+        Memory, literals and instructions only ever grow, so rolling back
+        truncates them; labels defined since the mark are undefined again.
+        """
+        memory_size, offset, defined = mark
+        for label in self._defined[defined:]:
+            self.labels.discard(label)
+            slot = self.literals[label]
+            if slot < memory_size:
+                self.memory[slot] = None
+        del self._defined[defined:]
+
+        while self.literals and self.memory_counter > memory_size:
+            self.literals.popitem()
+            self.memory_counter -= 1
+        del self.memory[memory_size:]
+        del self._encoded[memory_size:]
+        self.instructions.truncate(offset)
+        self.err = ''
+
     def _error(self, msg):
         self.err = msg
 
@@ -71,12 +124,14 @@ class Preprocessor:
             self._error(f'duplicate labels detected: {line}')
         else:
             self.labels.add(label)
+            self._defined.append(label)
             self._record_literal_if_not_known(label, is_id=True)
-            self._set_memory_for_literal(label, len(self.instructions))
+            self._set_memory_for_literal(label, self.instructions.offset())
 
     def _record_literal_if_not_known(self, literal, is_id=False):
         if literal not in self.literals:
             self.memory.append(None if is_id else literal)
+            self._encoded.append(SLOT.pack(self.memory_counter))
             self.literals[literal] = self.memory_counter
             self.memory_counter += 1
 
@@ -86,28 +141,39 @@ class Preprocessor:
     def _get_literal(self, name):
         return self.literals[name]
 
-    def _get_literal_as_i32(self, name):
-        return i32(self._get_literal(name))
-
     def _check_and_add_instruction(self, line):
-        instruction = Parser()
-        instruction.parse(line)
-        if instruction.err():
+        parsed = self.cache.parse(line)
+        if parsed is None:
             self._error(f'failed to parse instruction: {line}')
             return
 
-        info = self.OPCODES.get(instruction.opcode)
-        if info is None:
-            self._error(f'unknown opcode: {instruction.opcode}')
+        opcode, operand = parsed
+        template = self.OPCODES.get(opcode)
+        if template is None:
+            self._error(f'unknown opcode: {opcode}')
             return
 
-        opcode_method, operand_types = info
-        if len(instruction.operand) != len(operand_types):
+        if not template.accepts(tuple([state for state, _ in operand])):
+            self._operand_error(line, operand, template.operand_types)
+            return
+
+        if self.fold:
+            opcode, operand = fold_instruction(opcode, operand)
+            template = self.OPCODES[opcode]
+
+        literals, encoded = self.literals, self._encoded
+        self.instructions.emit(template.fill([
+            encoded[literals[value]] if value in literals
+            else self._encoded_slot(state, value)
+            for state, value in operand]))
+
+    def _operand_error(self, line, operand, operand_types):
+        if len(operand) != len(operand_types):
             self._error(f'invalid operand length: {line}')
             return
 
         for operand_item, expected_operand_type in \
-                zip(instruction.operand, operand_types):
+                zip(operand, operand_types):
             operand_type, operand_value = operand_item
             if State.mismatch(operand_type, expected_operand_type):
                 self._error(
@@ -117,19 +183,11 @@ class Preprocessor:
                     f'got {State.name(operand_type)}')
                 return
 
-        self._record(instruction.operand)
-        opcode_method(self._unpack(instruction.operand))
-
-    def _record(self, operand):
-        for state, value in operand:
-            if state == State.IDENTIFIER:
-                self._record_literal_if_not_known(value, is_id=True)
-            else:
-                self._record_literal_if_not_known(value)
-
-    def _instr(self, *bts):
-        for each in bts:
-            self.instructions += each
+    def _encoded_slot(self, state, value):
+        """ Record a new operand and return its encoded memory slot. """
+        self._record_literal_if_not_known(
+            value, is_id=state == State.IDENTIFIER)
+        return self._encoded[self.literals[value]]
 
     @staticmethod
     def _is_label(line):
@@ -142,173 +200,3 @@ class Preprocessor:
     @staticmethod
     def _parse_label_name(line):
         return line[:-1]
-
-    @staticmethod
-    def _unpack(operand):
-        return tuple([value for _, value in operand])
-
-    """ Abstracting common opcode practices. """
-    def _unary_operation(self, operand, *operations):
-        x, y = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(x),
-            *operations,
-            Op.POP, self._get_literal_as_i32(y))
-
-    def _binary_operation(self, operand, *operations):
-        x, y, z = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(x),
-            Op.PUSH, self._get_literal_as_i32(y),
-            *operations,
-            Op.POP, self._get_literal_as_i32(z))
-
-    def _logical_operation(self, operand, operation):
-        x, y, z = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(x),
-            Op.BOOL,
-            Op.PUSH, self._get_literal_as_i32(y),
-            Op.BOOL,
-            operation,
-            Op.POP, self._get_literal_as_i32(z))
-
-    """ Opcode-specific methods. """
-    def _nop_(self, _):
-        pass
-
-    def _put_(self, operand):
-        value, name = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(value),
-            Op.POP, self._get_literal_as_i32(name))
-
-    def _add_(self, operand):
-        self._binary_operation(operand, Op.ADD)
-
-    def _sub_(self, operand):
-        self._binary_operation(operand, Op.SUB)
-
-    def _mul_(self, operand):
-        self._binary_operation(operand, Op.MUL)
-
-    def _div_(self, operand):
-        self._binary_operation(operand, Op.DIV)
-
-    def _mod_(self, operand):
-        self._binary_operation(operand, Op.MOD)
-
-    def _gth_(self, operand):
-        self._binary_operation(operand, Op.GTH)
-
-    def _lth_(self, operand):
-        self._binary_operation(operand, Op.LTH)
-
-    def _geq_(self, operand):
-        self._binary_operation(operand, Op.GEQ)
-
-    def _leq_(self, operand):
-        self._binary_operation(operand, Op.LEQ)
-
-    def _eq_(self, operand):
-        self._binary_operation(operand, Op.EQ)
-
-    def _neq_(self, operand):
-        self._binary_operation(operand, Op.NEQ)
-
-    def _ini_(self, operand):
-        name = operand[0]
-        self._instr(
-            Op.INI,
-            Op.POP, self._get_literal_as_i32(name))
-
-    def _ins_(self, operand):
-        name = operand[0]
-        self._instr(
-            Op.INS,
-            Op.POP, self._get_literal_as_i32(name))
-
-    def _out_(self, operand):
-        name = operand[0]
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(name),
-            Op.OUT)
-
-    def _outl_(self, operand):
-        name = operand[0]
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(name),
-            Op.OUT,
-            Op.NL)
-
-    def _nl_(self, _):
-        self._instr(Op.NL)
-
-    def _con_(self, operand):
-        self._binary_operation(operand, Op.CON)
-
-    def _sti_(self, operand):
-        self._unary_operation(operand, Op.STI)
-
-    def _not_(self, operand):
-        self._unary_operation(operand, Op.BOOL, Op.NOT)
-
-    def _and_(self, operand):
-        self._logical_operation(operand, Op.AND)
-
-    def _or_(self, operand):
-        self._logical_operation(operand, Op.OR)
-
-    def _jump_(self, operand):
-        label = operand[0]
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.JUMP)
-
-    def _jmpt_(self, operand):
-        boolean, label = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.PUSH, self._get_literal_as_i32(boolean),
-            Op.JMPT)
-
-    def _jmpf_(self, operand):
-        boolean, label = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.PUSH, self._get_literal_as_i32(boolean),
-            Op.JMPF)
-
-    def _br_(self, operand):
-        label = operand[0]
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.BR)
-
-    def _brt_(self, operand):
-        boolean, label = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.PUSH, self._get_literal_as_i32(boolean),
-            Op.BRT)
-
-    def _brf_(self, operand):
-        boolean, label = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(label),
-            Op.PUSH, self._get_literal_as_i32(boolean),
-            Op.BRF)
-
-    def _back_(self, _):
-        self._instr(Op.BACK)
-
-    def _err_(self, operand):
-        message, error_code = operand
-        self._instr(
-            Op.PUSH, self._get_literal_as_i32(message),
-            Op.OUT,
-            Op.PUSH, self._get_literal_as_i32(error_code),
-            Op.ERR)
-
-    def _end_(self, _):
-        self._instr(Op.END)
@@ -0,0 +1,137 @@
+from .Op import Op
+from .make import i32
+
+
+""" Opcodes followed by an i32 memory slot operand. """
+WITH_OPERAND = (Op.PUSH, Op.POP)
+
+
+def decode(instructions):
+    """ Split bytecode into a list of [op, slot] pairs.
+
+    The slot is None for opcodes without an operand.
+    """
+    code = []
+    index = 0
+    while index < len(instructions):
+        op = instructions[index:index + 1]
+        index += 1
+        if op in WITH_OPERAND:
+            code.append([op, int.from_bytes(instructions[index:index + 4],
+                                            'big')])
+            index += 4
+        else:
+            code.append([op, None])
+    return code
+
+
+def encode(code):
+    return b''.join(
+        op if slot is None else op + i32(slot)
+        for op, slot in code
+    )
+
+
+def size(op):
+    return 5 if op in WITH_OPERAND else 1
+
+
+class Program:
+    """ Program is an editable view of assembled bytecode.
+
+    While a program is being edited, label slots in memory hold instruction
+    indices instead of byte offsets, so instructions can be removed without
+    recomputing addresses by hand. assemble() turns them back into offsets.
+    """
+    def __init__(self, memory, instructions, labels):
+        self.memory = list(memory)
+        self.labels = set(labels)
+        self.code = decode(instructions)
+
+        index_of = {}
+        offset = 0
+        for index, (op, _) in enumerate(self.code):
+            index_of[offset] = index
+            offset += size(op)
+        index_of[offset] = len(self.code)
+
+        for slot in self.labels:
+            self.memory[slot] = index_of[self.memory[slot]]
+
+    @classmethod
+    def from_preprocessor(cls, pre):
+        return cls(
+            memory=pre.memory,
+            instructions=pre.instructions.getvalue(),
+            labels={pre.literals[label] for label in pre.labels},
+        )
+
+    def assemble(self):
+        """ Return the (memory, instructions) pair for make.code. """
+        offsets = []
+        offset = 0
+        for op, _ in self.code:
+            offsets.append(offset)
+            offset += size(op)
+        offsets.append(offset)
+
+        memory = list(self.memory)
+        for slot in self.labels:
+            memory[slot] = offsets[memory[slot]]
+        return memory, encode(self.code)
+
+    def targets(self):
+        """ Return the instruction indices that labels point at. """
+        return {self.memory[slot] for slot in self.labels}
+
+    def written(self):
+        """ Return the memory slots that are assigned at run time. """
+        return {slot for op, slot in self.code if op == Op.POP}
+
+    def remove(self, indices):
+        """ Remove instructions, moving labels to the next kept one. """
+        if not indices:
+            return
+
+        new_index = []
+        kept = []
+        for index, instruction in enumerate(self.code):
+            new_index.append(len(kept))
+            if index not in indices:
+                kept.append(instruction)
+        new_index.append(len(kept))
+
+        self.code = kept
+        for slot in self.labels:
+            self.memory[slot] = new_index[self.memory[slot]]
+
+    def used(self):
+        """ Return the memory slots referenced by instructions. """
+        return {slot for _, slot in self.code if slot is not None}
+
+    def renumber(self, mapping):
+        """ Move memory slots according to `mapping` (old slot -> new slot).
+
+        Slots missing from the mapping are dropped. Slots mapped onto the
+        same new slot share it; the value of the first one wins.
+        """
+        memory = [None] * (max(mapping.values(), default=-1) + 1)
+        for old, new in sorted(mapping.items(), reverse=True):
+            memory[new] = self.memory[old]
+
+        self.memory = memory
+        self.labels = {mapping[slot] for slot in self.labels
+                       if slot in mapping}
+        for instruction in self.code:
+            if instruction[1] is not None:
+                instruction[1] = mapping[instruction[1]]
+
+    def compact(self):
+        """ Drop memory slots no instruction refers to.
+
+        Returns the number of slots dropped.
+        """
+        used = sorted(self.used())
+        dropped = len(self.memory) - len(used)
+        self.renumber({old: new for new, old in enumerate(used)})
+        return dropped
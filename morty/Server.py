@@ -0,0 +1,134 @@
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import threading
+
+from . import __version__
+from . import build
+
+
+class FreshFiles:
+    """ FreshFiles maps paths to their cleaned lines for the Loader.
+
+    Entries are dropped as soon as the modification time or size of their
+    file changes, so a long-running process never assembles stale includes.
+    """
+    def __init__(self):
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def get(self, path):
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        stamp, lines = entry
+        if _stamp(path) != stamp:
+            # Requests run in threads; another one may have dropped it.
+            self._entries.pop(path, None)
+            return None
+        return lines
+
+    def pop(self, path):
+        self._entries.pop(path, None)
+
+    def __setitem__(self, path, lines):
+        # Stamping after reading may miss an edit made in between; that edit
+        # is then only seen once the file changes again, as with make.
+        self._entries[path] = _stamp(path), lines
+
+
+def assemble(request, files=None):
+    """ Handle an assemble request and return the response.
+
+    Only includes stay in `files` afterwards: with thousands of entry points
+    each assembled now and then, keeping their sources would only grow.
+    """
+    options = request.get('options') or {}
+    root = Path(request['source']).absolute()
+    keep = files is None or root in files
+    try:
+        report = build.assemble(
+            request['source'], request['target'],
+            text=request.get('text'), files=files,
+            **{key: options[key] for key in build.OPTIONS if key in options})
+    except OSError as e:
+        return {'err': f'[write] {e}', 'source': request['source'],
+                'target': request['target'], 'saved': 0}
+    finally:
+        if not keep:
+            files.pop(root)
+    return {'err': report.err, 'source': str(report.source),
+            'target': str(report.target), 'saved': report.saved}
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """ Handler answers JSON requests, one per line, on a connection. """
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'err': f'bad request: {e}'}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Server assembles programs on behalf of clients on a Unix socket.
+
+    Cleaned include files and parsed lines stay in memory between requests,
+    so repeated builds skip interpreter startup, imports and most of the
+    reading and parsing.
+    """
+    daemon_threads = True
+
+    def __init__(self, path):
+        _remove_stale_socket(path)
+        self.files = FreshFiles()
+        super().__init__(path, Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+    def dispatch(self, request):
+        op = request.get('op', 'assemble')
+        if op == 'assemble':
+            return assemble(request, self.files)
+        if op == 'ping':
+            return {'err': '', 'version': __version__}
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown).start()
+            return {'err': ''}
+        return {'err': f'unknown op: {op}'}
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _remove_stale_socket(path):
+    """ Remove a socket file nobody listens on any more. """
+    if not Path(path).exists():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise OSError(f'a server is already listening on {path}')
@@ -0,0 +1,55 @@
+from itertools import product
+
+from .Parser import State
+
+
+""" Operand states accepted where the Preprocessor expects a given state. """
+ACCEPTED = {
+    State.VALUE: (State.IDENTIFIER, State.INTEGER, State.STRING),
+    State.NOT_INTEGER: (State.IDENTIFIER, State.STRING),
+    State.NOT_STRING: (State.IDENTIFIER, State.INTEGER),
+    State.IDENTIFIER: (State.IDENTIFIER,),
+    State.INTEGER: (State.INTEGER,),
+    State.STRING: (State.STRING,),
+}
+
+
+class Template:
+    """ Template describes how one SmallO instruction becomes bytecode.
+
+    `operand_types` are the states the operand accepts, as in State.mismatch.
+    `shape` lists what to emit: opcodes as bytes, and the memory slot of the
+    n-th operand as the integer n. Both are compiled once: the accepted
+    operand states into a set of every valid combination, and the shape into
+    constant byte strings with holes for encoded slots.
+    """
+    def __init__(self, operand_types, shape):
+        self.operand_types = operand_types
+        self.shape = shape
+        self.accepted = frozenset(
+            product(*[ACCEPTED[state] for state in operand_types]))
+
+        self.parts = []
+        self.holes = []
+        constant = b''
+        for part in shape:
+            if isinstance(part, int):
+                if constant:
+                    self.parts.append(constant)
+                    constant = b''
+                self.holes.append((len(self.parts), part))
+                self.parts.append(None)
+            else:
+                constant += part
+        if constant:
+            self.parts.append(constant)
+
+    def accepts(self, states):
+        return states in self.accepted
+
+    def fill(self, slots):
+        """ Return the bytecode for operands encoded as `slots`. """
+        parts = self.parts.copy()
+        for position, operand in self.holes:
+            parts[position] = slots[operand]
+        return b''.join(parts)
@@ -0,0 +1,56 @@
+from contextlib import contextmanager, nullcontext
+import json
+import time
+
+
+class Timings:
+    """ Timings records wall time per assembly stage and a few counters.
+
+    Stages are timed with stage(), which is a context manager; counters are
+    set directly. Everything is kept in plain dicts so reports carrying
+    timings can be sent back from worker processes.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (self.stages.get(name, 0.0) +
+                                 time.perf_counter() - start)
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_dict(self):
+        return {'stages': dict(self.stages), 'total': self.total(),
+                **self.counts}
+
+    def json(self, **extra):
+        return json.dumps({**extra, **self.as_dict()})
+
+    def text(self):
+        lines = [f'  {name:<12} {seconds * 1000:>10.2f} ms'
+                 for name, seconds in self.stages.items()]
+        lines.append(f'  {"total":<12} {self.total() * 1000:>10.2f} ms')
+        lines.extend(f'  {name:<12} {value:>10}'
+                     for name, value in self.counts.items())
+        return '\n'.join(lines)
+
+
+class NoTimings:
+    """ NoTimings has the interface of Timings and records nothing. """
+    _stage = nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+
+NO_TIMINGS = NoTimings()
@@ -0,0 +1,159 @@
+import os
+import time
+
+from .Loader import Loader
+from .ParseCache import ParseCache
+from .Preprocessor import Preprocessor
+from .Timings import Timings, NO_TIMINGS
+from . import build
+from . import util
+
+
+class Watcher:
+    """ Watcher reassembles a program whenever one of its files changes.
+
+    Between builds it keeps the cleaned lines of every file, the parse of
+    every distinct line, and the preprocessor itself together with marks
+    taken every CHECKPOINT lines. A rebuild rereads only the files that
+    changed, rolls the preprocessor back to the last mark before the first
+    changed line and feeds it the rest of the program from there. Changes
+    are found by polling the modification time and size of the source and
+    its includes.
+    """
+    CHECKPOINT = 1024
+
+    def __init__(self, source, target, interval=0.2, optimized=False,
+                 shake=False, reuse_slots=False, mem_format='json',
+                 timed=False, depfile=False):
+        self.source = source
+        self.target = target
+        self.interval = interval
+        self.optimized = optimized
+        self.options = dict(optimized=optimized, shake=shake,
+                            reuse_slots=reuse_slots, mem_format=mem_format)
+        self.timed = timed
+        self.depfile = depfile
+
+        self.files = {}
+        self.stamps = {}
+        self.parse_cache = ParseCache(maxsize=2 ** 20)
+        self.pre = None
+        self.code = []
+        self.marks = []
+
+    def changed(self):
+        """ Return the watched paths that changed since the last build. """
+        return [path for path, stamp in self.stamps.items()
+                if self._stamp(path) != stamp]
+
+    def build(self, changed=()):
+        """ Reassemble the program, rereading `changed`, and return a Report.
+
+        The report carries the rebuild time in seconds as `elapsed`.
+        """
+        start = time.perf_counter()
+        for path in changed:
+            self.files.pop(path, None)
+
+        report = build.Report(self.source, self.target)
+        if self.timed:
+            report.timings = Timings()
+        self._build(report)
+        report.elapsed = time.perf_counter() - start
+
+        # Files no longer included stop being watched.
+        self.files = {path: lines for path, lines in self.files.items()
+                      if path in report.included}
+        self.stamps = {path: self._stamp(path) for path in report.included}
+        return report
+
+    def watch(self):
+        """ Yield a Report for the first build and after every change. """
+        yield self.build()
+        while True:
+            time.sleep(self.interval)
+            changed = self.changed()
+            if changed:
+                yield self.build(changed)
+
+    def _build(self, report):
+        timings = report.timings or NO_TIMINGS
+
+        if util.source_file_extension_is_invalid(self.source):
+            report.fail('source', "file extension is invalid: '.so' expected")
+            return
+
+        loader = Loader(files=self.files)
+        report.included = loader.included
+        with timings.stage('load'):
+            loader.load(self.source)
+        if loader.err:
+            report.fail('loader', loader.err)
+            return
+
+        with timings.stage('preprocess'):
+            start = self._preprocess(loader.code)
+        if report.timings is not None:
+            timings.count('lines', len(loader.code))
+            timings.count('reprocessed', len(loader.code) - start)
+
+        if self.pre.err:
+            report.fail('preprocessor', self.pre.err)
+            self.pre = None
+            return
+
+        build.emit(report, self.pre, **self.options)
+        if self.depfile and not report.err:
+            build.write_depfile(report)
+
+    def _preprocess(self, code):
+        """ Bring the preprocessor up to date with `code`.
+
+        Returns the index of the first line that was fed to it again.
+        """
+        start = 0
+        if self.pre is None:
+            self.pre = Preprocessor(cache=self.parse_cache,
+                                    fold=self.optimized)
+            self.marks = []
+        else:
+            same = _common_prefix(self.code, code)
+            while self.marks and self.marks[-1][0] > same:
+                self.marks.pop()
+            start, mark = self.marks.pop()
+            self.pre.rollback(mark)
+
+        self.code = code
+        pre = self.pre
+        for begin in range(start, len(code), self.CHECKPOINT):
+            self.marks.append((begin, pre.mark()))
+            pre.feed(code[begin:begin + self.CHECKPOINT])
+        self.marks.append((len(code), pre.mark()))
+        pre.feed(('end',))
+        return start
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+def _common_prefix(old, new):
+    """ Return the number of leading lines `old` and `new` have in common. """
+    size = min(len(old), len(new))
+    if old[:size] == new[:size]:
+        return size
+
+    low, high = 0, size
+    while high - low > 1024:
+        middle = (low + high) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle
+    while low < high and old[low] == new[low]:
+        low += 1
+    return low
@@ -0,0 +1,17 @@
+__version__ = '0.1.0'
+
+from .errors import (AssemblyError, SourceError, LoaderError,
+                     PreprocessorError, MakeError, LinkError)
+
+
+__all__ = ['assemble_source', 'assemble_file', 'AssemblyError', 'SourceError',
+           'LoaderError', 'PreprocessorError', 'MakeError', 'LinkError']
+
+
+def __getattr__(name):
+    # The assembler is imported on first use, so the command line and the
+    # thin client do not pay for it when they only need part of the package.
+    if name in ('assemble_source', 'assemble_file'):
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,114 @@
+""" Assemble programs from asyncio code without blocking the event loop.
+
+Assembly happens in two steps. First the source and every file it includes
+are gathered on the event loop: each include is requested as soon as the
+file naming it has been read, so independent reads overlap. Reads from the
+file system and from plain callables go to the loop's default executor,
+and coroutine resolvers are awaited. The gathered files are then assembled
+in `executor`, the loop's default thread pool unless a process pool or
+another executor is given.
+
+Requests can be cancelled and take a `timeout` in seconds, both of which
+abandon the request at its next await. Work already handed to an executor
+cannot be interrupted; it runs to completion and its result is dropped.
+"""
+import asyncio
+from collections.abc import Mapping
+from functools import partial
+import inspect
+import os
+
+from . import api
+from .Loader import Loader
+from .errors import LoaderError
+
+
+async def assemble_source(text, includes_resolver=None, name='main.so',
+                          executor=None, timeout=None, **options):
+    """ Assemble SmallO code in `text` and return the Rick bytecode.
+
+    Arguments and errors are those of morty.assemble_source(), except that
+    `includes_resolver` may also be a coroutine function.
+    """
+    return await asyncio.wait_for(
+        _assemble(name, text, includes_resolver, executor, options), timeout)
+
+
+async def assemble_file(path, includes_resolver=None, executor=None,
+                        timeout=None, **options):
+    """ Assemble the program at `path` and return the Rick bytecode. """
+    return await asyncio.wait_for(
+        _assemble(path, None, includes_resolver, executor, options), timeout)
+
+
+async def _assemble(name, text, resolver, executor, options):
+    read = _reader(resolver)
+    name = os.path.normpath(name)
+    if text is None:
+        text = await _read_file(name)
+        if text is None:
+            raise LoaderError(f'path {name} does not exist', name)
+
+    files = await _gather(name, text, read)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(
+        api.assemble_source, text, files, name=name, **options))
+
+
+async def _gather(name, text, read):
+    """ Read every file `name` includes, directly or not, concurrently.
+
+    Returns the texts by normalised path, with None for missing files.
+    """
+    files = {name: text}
+
+    async def visit(path, text):
+        if text is None:
+            return
+        # Broken includes are left for the assembly to report.
+        _, includes = Loader(resolve=files.get).sections(path, text)
+        new = []
+        for include in map(str, includes):
+            if include not in files:
+                files[include] = None
+                new.append(include)
+        await asyncio.gather(*map(fetch, new))
+
+    async def fetch(path):
+        files[path] = await read(path)
+        await visit(path, files[path])
+
+    await visit(name, text)
+    return files
+
+
+def _reader(resolver):
+    """ Return a coroutine function reading a file through `resolver`. """
+    if resolver is None:
+        return _read_file
+
+    if isinstance(resolver, Mapping):
+        async def read(path):
+            return resolver.get(path)
+    elif inspect.iscoroutinefunction(resolver):
+        read = resolver
+    else:
+        async def read(path):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, resolver, path)
+    return read
+
+
+async def _read_file(path):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _read_text, path)
+
+
+def _read_text(path):
+    try:
+        with open(path) as file:
+            return file.read()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    except OSError as e:
+        raise LoaderError(str(e), path) from None
@@ -0,0 +1,52 @@
+""" Assemble programs in memory, for embedding Morty in other programs.
+
+Unlike the command line, these functions never write files or exit: they
+return the bytecode and raise an AssemblyError when a program cannot be
+assembled.
+"""
+from collections.abc import Mapping
+
+from . import build
+from .errors import ERRORS
+
+
+def assemble_source(text, includes_resolver=None, name='main.so',
+                    **options):
+    """ Assemble SmallO code in `text` and return the Rick bytecode.
+
+    `name` is the path of the program, which includes are relative to.
+    Included files are looked up in `includes_resolver`: a mapping from
+    normalised paths such as 'lib/math.so' to their text, or a callable
+    taking such a path and returning its text or None. Without a resolver,
+    includes are read from the file system. Remaining keyword arguments are
+    the `optimized`, `shake`, `reuse_slots` and `mem_format` options of
+    build.assemble().
+    """
+    return _assemble(name, text, includes_resolver, options)
+
+
+def assemble_file(path, includes_resolver=None, **options):
+    """ Assemble the program at `path` and return the Rick bytecode.
+
+    Includes come from `includes_resolver` when given, as for
+    assemble_source(), and from the file system otherwise.
+    """
+    if includes_resolver is None:
+        return _assemble(path, None, None, options)
+
+    try:
+        with open(path) as file:
+            text = file.read()
+    except OSError as e:
+        raise ERRORS['loader'](str(e), path) from None
+    return _assemble(path, text, includes_resolver, options)
+
+
+def _assemble(source, text, resolver, options):
+    if isinstance(resolver, Mapping):
+        resolver = resolver.get
+    report = build.assemble(source, None, text=text, resolve=resolver,
+                            **options)
+    if report.err:
+        raise ERRORS[report.stage](report.message, source)
+    return report.image
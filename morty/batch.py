@@ -0,0 +1,100 @@
+""" Assemble the many programs of a JSON lines manifest in one process.
+
+Each line of a manifest is an object giving the program either as a path in
+"source" or inline as "text", and where to put the bytecode in "target".
+Inline programs are named by "source" when it is given, which includes are
+relative to. "options" may set any of build.OPTIONS for the entry. Blank
+lines are skipped.
+
+Every entry shares the cleaned files and parsed lines of the ones before it,
+so an include used by a thousand programs is read and parsed once.
+"""
+import json
+from pathlib import Path
+
+from . import build
+
+
+def run(lines, archive=None, **options):
+    """ Assemble the entries in `lines`, yielding a status for each.
+
+    A status holds the line number of the entry, its source and target and
+    the error, which is empty on success. With `archive`, images are added
+    to that Archive under their target instead of being written out, and
+    the status tells where. Remaining keyword arguments are defaults for
+    the options of every entry.
+    """
+    files = {}
+    directories = set()
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            yield _entry(number, line, files, directories, archive, options)
+
+
+def _entry(number, line, files, directories, archive, defaults):
+    status = {'line': number, 'source': None, 'target': None, 'err': ''}
+    try:
+        entry = _parse(line)
+    except ValueError as e:
+        status['err'] = f'[manifest] {e}'
+        return status
+
+    text = entry.get('text')
+    source = entry.get('source') or f'entry{number}.so'
+    target = entry['target']
+    status.update(source=source, target=target)
+
+    options = dict(defaults)
+    options.update((key, value)
+                   for key, value in (entry.get('options') or {}).items()
+                   if key in build.OPTIONS)
+    mem_format = options.get('mem_format', 'json')
+    if mem_format not in build.MEM_FORMATS:
+        status['err'] = f'[manifest] unknown mem_format {mem_format}'
+        return status
+
+    # Only includes are worth keeping: a program is rarely assembled twice.
+    root = Path(source).absolute()
+    keep = root in files
+    try:
+        if archive is None:
+            _make_parent(target, directories)
+        report = build.assemble(source, None if archive else target,
+                                text=text, files=files, **options)
+    except OSError as e:
+        status['err'] = f'[write] {e}'
+        return status
+    finally:
+        if not keep:
+            files.pop(root, None)
+
+    status['err'] = report.err
+    if report.err or archive is None:
+        return status
+
+    try:
+        status['offset'], status['size'] = archive.add(target, report.image)
+    except ValueError as e:
+        status['err'] = f'[archive] {e}'
+    return status
+
+
+def _make_parent(target, directories):
+    parent = Path(target).parent
+    if parent not in directories:
+        parent.mkdir(parents=True, exist_ok=True)
+        directories.add(parent)
+
+
+def _parse(line):
+    entry = json.loads(line)
+    if not isinstance(entry, dict):
+        raise ValueError('entry is not an object')
+    if not isinstance(entry.get('target'), str):
+        raise ValueError('entry has no target')
+    for field in ('source', 'text'):
+        if field in entry and not isinstance(entry[field], str):
+            raise ValueError(f'{field} is not a string')
+    if 'source' not in entry and 'text' not in entry:
+        raise ValueError('entry has neither source nor text')
+    return entry
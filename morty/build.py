@@ -0,0 +1,333 @@
+from contextlib import contextmanager
+from functools import partial
+import os
+from pathlib import Path
+
+from . import util
+from .Linker import Linker
+from .Loader import Loader
+from .ObjectFile import ObjectFile, Section
+from .ParseCache import ParseCache
+from .Preprocessor import Preprocessor
+from .Program import Program, decode
+from .Timings import Timings, NO_TIMINGS
+from . import make
+from . import optimize
+
+
+""" Memory section encoders, keyed by the name of the format. """
+MEM_FORMATS = {
+    'json': make.mem,
+    'binary': make.mem_bin,
+}
+
+
+""" Options that server requests and batch entries may pass on to
+assemble(). """
+OPTIONS = ('optimized', 'shake', 'reuse_slots', 'mem_format', 'depfile')
+
+
+class Report:
+    """ Report describes the outcome of assembling one program.
+
+    `err` is empty on success, which keeps assembly usable from worker
+    processes where exiting through util.err is not an option; `stage` and
+    `message` hold its parts. `timings` is None unless assembly was timed.
+    `included` holds the paths of the source and every file it includes.
+    `image` holds the bytecode when there is no target to write it to.
+    """
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.err = ''
+        self.stage = None
+        self.message = ''
+        self.saved = 0
+        self.timings = None
+        self.included = set()
+        self.image = None
+
+    def fail(self, stage, message):
+        self.stage = stage
+        self.message = message
+        self.err = f'[{stage}] {message}'
+
+
+def assemble(source, target, cache_dir=None, io_threads=1, stream=False,
+             optimized=False, shake=False, reuse_slots=False,
+             mem_format='json', timed=False, text=None, files=None,
+             relocatable=False, depfile=False, resolve=None):
+    """ Assemble `source` into `target` and return a Report.
+
+    With `timed`, the report carries Timings of every stage together with
+    line, instruction and memory counts and the hits and misses of the
+    caches. `text` replaces the contents of `source`, and `files` lets the
+    Loader keep cleaned sources in memory between calls. `resolve` replaces
+    the file system for the Loader. With `relocatable`, includes are left
+    out and `target` becomes an object file for link(); whole-program
+    options are ignored. With `depfile`, a successful build also writes
+    write_depfile(). When `target` is None, nothing is written and the
+    bytecode is left in report.image.
+    """
+    report = Report(source, target)
+    timings = Timings() if timed else NO_TIMINGS
+    if timed:
+        report.timings = timings
+
+    if util.source_file_extension_is_invalid(source):
+        report.fail('source', "file extension is invalid: '.so' expected")
+        return report
+
+    loader = Loader(cache=_file_cache(cache_dir), workers=io_threads,
+                    files=files, resolve=resolve)
+    report.included = loader.included
+    if relocatable:
+        with _counted_caches(loader, report.timings):
+            _assemble_object(report, loader, text, optimized, timings)
+        if depfile and not report.err:
+            write_depfile(report)
+        return report
+
+    pre = Preprocessor(cache=loader.cache, fold=optimized)
+    with _counted_caches(loader, report.timings):
+        if stream:
+            lines = loader.stream(source, text)
+            if timed:
+                lines = _counted(lines, timings)
+            with timings.stage('stream'):
+                pre.process(lines)
+        else:
+            with timings.stage('load'):
+                loader.load(source, text)
+            if timed:
+                timings.count('lines', len(loader.code))
+            if not loader.err:
+                with timings.stage('preprocess'):
+                    pre.process(loader.code)
+
+    if loader.err:
+        report.fail('loader', loader.err)
+        return report
+
+    if pre.err:
+        report.fail('preprocessor', pre.err)
+        return report
+
+    emit(report, pre, optimized=optimized, shake=shake,
+         reuse_slots=reuse_slots, mem_format=mem_format)
+    if depfile and not report.err:
+        write_depfile(report)
+    return report
+
+
+def write_depfile(report):
+    """ Write the files behind report.target as a Makefile rule.
+
+    The rule goes to the target path with '.d' appended, for make and ninja
+    to rebuild the target only when one of those files changes. The source
+    comes first. Paths are relative to the working directory when the
+    target is, and absolute otherwise. Without a target nothing is written.
+    """
+    if report.target is None:
+        return
+    name = _normalised if os.path.isabs(report.target) else _relative
+    source = Path(report.source).absolute()
+    paths = [name(path)
+             for path in [source, *sorted(report.included - {source})]]
+    make.write(code=make.deps(report.target, paths),
+               path=f'{report.target}.d')
+
+
+def _assemble_object(report, loader, text, optimized, timings):
+    with timings.stage('load'):
+        sections, includes = loader.sections(report.source, text)
+    if loader.err:
+        report.fail('loader', loader.err)
+        return
+
+    obj = ObjectFile(_normalised(report.source), [],
+                     [_normalised(path) for path in includes])
+    with timings.stage('preprocess'):
+        for lines in sections:
+            pre = Preprocessor(cache=loader.cache, fold=optimized)
+            pre.feed(lines)
+            if pre.err:
+                report.fail('preprocessor', pre.err)
+                return
+            obj.sections.append(Section.from_preprocessor(pre))
+
+    with timings.stage('make'):
+        image = obj.encode()
+    _write(report, image, timings)
+
+    if report.timings is not None:
+        timings.count('lines', sum(map(len, sections)))
+        timings.count('sections', len(sections))
+        timings.count('bytes', len(image))
+
+
+def link(objects, target, optimized=False, shake=False, reuse_slots=False,
+         mem_format='json', timed=False):
+    """ Link the object files at `objects` into `target`; return a Report.
+
+    The first object is the entry point. Options are those of assemble(),
+    except that `optimized` no longer folds constants: that happens when the
+    objects are assembled.
+    """
+    objects = list(objects)
+    report = Report(objects[0] if objects else None, target)
+    timings = Timings() if timed else NO_TIMINGS
+    if timed:
+        report.timings = timings
+    if not objects:
+        report.fail('link', 'no objects to link')
+        return report
+
+    loaded = []
+    with timings.stage('load'):
+        for path in objects:
+            try:
+                with open(path, 'rb') as file:
+                    loaded.append(ObjectFile.decode(file.read()))
+            except (OSError, ValueError) as e:
+                report.fail('link', f'{path}: {e}')
+                return report
+    report.included = {obj.source for obj in loaded}
+
+    linker = Linker()
+    with timings.stage('link'):
+        linker.link(loaded)
+    if linker.err:
+        report.fail('link', linker.err)
+        return report
+
+    emit(report, linker, optimized=optimized, shake=shake,
+         reuse_slots=reuse_slots, mem_format=mem_format)
+    return report
+
+
+def emit(report, pre, optimized=False, shake=False, reuse_slots=False,
+         mem_format='json'):
+    """ Optimize the program held by `pre` and write it to report.target.
+
+    `pre` is a Preprocessor or a Linker.
+    """
+    timings = report.timings or NO_TIMINGS
+    memory, instructions = pre.memory, pre.instructions.getvalue()
+
+    if optimized or shake or reuse_slots:
+        with timings.stage('optimize'):
+            program = Program.from_preprocessor(pre)
+            if optimized:
+                optimize.peephole(program)
+            if shake:
+                size = _size(*program.assemble())
+                optimize.shake(program)
+                report.saved = size - _size(*program.assemble())
+            if reuse_slots:
+                optimize.share_slots(program)
+            memory, instructions = program.assemble()
+
+    try:
+        with timings.stage('make'):
+            image = make.code(
+                mem=MEM_FORMATS[mem_format](*memory),
+                ins=instructions
+            )
+    except ValueError as e:
+        report.fail('make', str(e))
+        return
+
+    _write(report, image, timings)
+
+    if report.timings is not None:
+        timings.count('includes', len(report.included))
+        timings.count('instructions', len(decode(instructions)))
+        timings.count('memory', len(memory))
+        timings.count('bytes', len(image))
+
+
+def _write(report, image, timings):
+    if report.target is None:
+        report.image = image
+        return
+    with timings.stage('write'):
+        make.write(code=image, path=report.target)
+
+
+def assemble_many(pairs, workers=1, **options):
+    """ Assemble (source, target) pairs, yielding a Report for each.
+
+    Reports come back in the order of `pairs`. With more than one worker the
+    programs are assembled in a process pool. Remaining keyword arguments are
+    passed on to assemble().
+    """
+    pairs = list(pairs)
+    sources = [source for source, _ in pairs]
+    targets = [target for _, target in pairs]
+    task = partial(assemble, **options)
+
+    if workers <= 1 or len(pairs) <= 1:
+        yield from map(task, sources, targets)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(task, sources, targets)
+
+
+def _size(memory, instructions):
+    return len(make.mem(*memory)) + len(instructions)
+
+
+def _counted(lines, timings):
+    count = 0
+    for count, line in enumerate(lines, 1):
+        yield line
+    timings.count('lines', count)
+
+
+@contextmanager
+def _counted_caches(loader, timings):
+    """ Count the cache hits and misses of the block into `timings`.
+
+    The parse cache is shared by the whole process, so the counts include
+    the parses of any build running alongside. Lines whose parse came with
+    a file cache entry count as neither a parse hit nor a miss.
+    """
+    if timings is None:
+        yield
+        return
+
+    file_cache = loader.cache
+    parses = ParseCache.shared() if file_cache is None \
+        else file_cache.parse_cache
+    hits, misses = parses.hits, parses.misses
+    try:
+        yield
+    finally:
+        timings.count('parse_hits', parses.hits - hits)
+        timings.count('parse_misses', parses.misses - misses)
+        if file_cache is not None:
+            timings.count('file_hits', file_cache.hits)
+            timings.count('file_misses', file_cache.misses)
+
+
+def _relative(path):
+    relative = os.path.relpath(path)
+    if relative.startswith(os.pardir):
+        return os.path.normpath(path)
+    return relative
+
+
+def _normalised(path):
+    return os.path.normpath(os.path.abspath(path))
+
+
+def _file_cache(cache_dir):
+    if not cache_dir:
+        return None
+    # Imported on demand: hashing is only needed when caching to disk.
+    from .FileCache import FileCache
+    return FileCache(cache_dir)
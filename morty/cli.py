@@ -1,17 +1,244 @@
+from pathlib import Path
+import sys
+
 import click
-import colorama
 
 from . import util
-from .Loader import Loader
-from .Preprocessor import Preprocessor
-from . import make
+from . import build
+
+
+class DefaultGroup(click.Group):
+    """ Group that runs `assemble` unless another command is named. """
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in self.commands and args[0] != '--help':
+            args = ['assemble', *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultGroup)
+def main():
+    """ Morty is a snappy and lightweight assembler for the SmallO assembly.
+
+    Run `morty SOURCE...` or `morty assemble SOURCE...` to assemble programs.
+    """
+
+
+@main.command(help='Assemble SmallO code to produce bytecode for Rick.')
+@click.argument(
+    'sources',
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    '--target',
+    type=click.Path(file_okay=True,
+                    dir_okay=False),
+    default=None,
+    help='Path to bytecode target for a single source [default: out.rk].',
+)
+@click.option(
+    '--out-dir',
+    type=click.Path(file_okay=False,
+                    dir_okay=True),
+    default=None,
+    help='Directory for bytecode targets when assembling many sources.',
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of programs to assemble in parallel.',
+)
+@click.option(
+    '--cache-dir',
+    type=click.Path(file_okay=False,
+                    dir_okay=True),
+    envvar='MORTY_CACHE_DIR',
+    help='Reuse cleaned and parsed source files from this directory.',
+)
+@click.option(
+    '--io-threads',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of threads reading and cleaning include files.',
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Feed source lines to the preprocessor as they are loaded.',
+)
+@click.option(
+    '-O', '--optimize', 'optimized',
+    is_flag=True,
+    help='Fold constant expressions and run peephole optimizations.',
+)
+@click.option(
+    '--shake',
+    is_flag=True,
+    help='Drop code and memory unreachable from the entry point.',
+)
+@click.option(
+    '--reuse-slots',
+    is_flag=True,
+    help='Let variables with disjoint live ranges share memory slots.',
+)
+@click.option(
+    '--mem-format',
+    type=click.Choice(list(build.MEM_FORMATS)),
+    default='json',
+    show_default=True,
+    help='Encoding of the memory section.',
+)
+@click.option(
+    '--timings',
+    is_flag=True,
+    help='Report time spent in each stage.',
+)
+@click.option(
+    '--timings-format',
+    type=click.Choice(['text', 'json']),
+    default=None,
+    help='Report timings as text or JSON lines; implies --timings.',
+)
+@click.option(
+    '--profile',
+    type=click.Path(file_okay=True,
+                    dir_okay=False),
+    default=None,
+    help='Profile this process; write pstats to the file and collapsed '
+         'stacks to FILE.collapsed.',
+)
+@click.option(
+    '--watch',
+    is_flag=True,
+    help='Keep running and reassemble a single source whenever it or one '
+         'of its includes changes.',
+)
+@click.option(
+    '-MD', '--depfile',
+    is_flag=True,
+    help='Also write the files each target was assembled from to TARGET.d '
+         'as a Makefile rule, for make or ninja.',
+)
+@click.option(
+    '-c', '--compile-only', 'relocatable',
+    is_flag=True,
+    help='Assemble each source to a relocatable object file without its '
+         'includes [default target: out.o]; see `morty link`.',
+)
+def assemble(sources, target, out_dir, jobs, cache_dir, io_threads, stream,
+             optimized, shake, reuse_slots, mem_format, timings,
+             timings_format, profile, watch, depfile, relocatable):
+    timings = _timings_format(timings, timings_format)
+    options = dict(cache_dir=cache_dir, io_threads=io_threads, stream=stream,
+                   optimized=optimized, shake=shake, reuse_slots=reuse_slots,
+                   mem_format=mem_format, timed=timings is not None,
+                   relocatable=relocatable, depfile=depfile)
+
+    if relocatable and (watch or shake or reuse_slots):
+        util.err('--compile-only does not take --watch, --shake or '
+                 '--reuse-slots; pass them to `morty link`')
+
+    if watch:
+        if len(sources) != 1 or out_dir is not None:
+            util.err('--watch takes a single source')
+        _watch(sources[0], target or 'out.rk', timings,
+               dict(optimized=optimized, shake=shake, reuse_slots=reuse_slots,
+                    mem_format=mem_format, timed=timings is not None,
+                    depfile=depfile))
+        return
+
+    if profile is None:
+        _assemble(sources, target, out_dir, jobs, shake, timings, options)
+        return
+
+    from .profiling import profiled
+    with profiled(profile):
+        _assemble(sources, target, out_dir, jobs, shake, timings, options)
+
+
+def _assemble(sources, target, out_dir, jobs, shake, timings, options):
+    suffix = '.o' if options['relocatable'] else '.rk'
+    if len(sources) == 1 and out_dir is None and Path(sources[0]).is_file():
+        report = build.assemble(sources[0], target or f'out{suffix}',
+                                **options)
+        if report.err:
+            util.err(report.err)
+        if shake:
+            click.echo(f'tree shaking saved {report.saved} bytes')
+        _print_timings(report, timings)
+        return
+
+    if target is not None:
+        util.err('--target takes a single source; use --out-dir instead')
+
+    pairs = [
+        (source, util.target_path(source, name, out_dir, suffix))
+        for source, name in util.expand_sources(sources)
+    ]
+    if not pairs:
+        util.err('no sources to assemble')
+
+    targets = [target for _, target in pairs]
+    if len(set(targets)) != len(targets):
+        util.err('several sources map to the same target')
+
+    for target in targets:
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+    failed = 0
+    for report in build.assemble_many(pairs, jobs, **options):
+        if report.err:
+            failed += 1
+            util.print_err(f'{report.source}: {report.err}')
+        elif shake:
+            click.echo(f'{report.source} -> {report.target} '
+                       f'(saved {report.saved} bytes)')
+        else:
+            click.echo(f'{report.source} -> {report.target}')
+        _print_timings(report, timings)
+
+    if failed:
+        util.err(f'{failed} of {len(pairs)} sources failed to assemble')
+
+
+def _watch(source, target, timings, options):
+    from .Watcher import Watcher
+
+    try:
+        for report in Watcher(source, target, **options).watch():
+            if report.err:
+                util.print_err(report.err)
+            else:
+                click.echo(f'{source} -> {target} '
+                           f'({report.elapsed * 1000:.1f} ms)')
+            _print_timings(report, timings)
+    except KeyboardInterrupt:
+        pass
+
+
+def _timings_format(timings, timings_format):
+    """ Return how to report timings, or None not to time at all. """
+    return timings_format or ('text' if timings else None)
 
-colorama.init()
 
+def _print_timings(report, timings):
+    if report.timings is None:
+        return
+    if timings == 'json':
+        click.echo(report.timings.json(source=str(report.source),
+                                       target=str(report.target)), err=True)
+    else:
+        click.echo(f'timings for {report.source}:', err=True)
+        click.echo(report.timings.text(), err=True)
 
-@click.command(help='Assemble SmallO code to produce bytecode for Rick.')
+
+@main.command(help='Link object files made with `morty -c` into Rick '
+                   'bytecode. The first object is the entry point.')
 @click.argument(
-    'source',
+    'objects',
+    nargs=-1,
+    required=True,
     type=click.Path(exists=True,
                     file_okay=True,
                     dir_okay=False),
@@ -21,32 +248,221 @@ colorama.init()
     type=click.Path(file_okay=True,
                     dir_okay=False),
     default='out.rk',
+    show_default=True,
     help='Path to bytecode target.',
 )
-def assemble(source, target):
-    if util.source_file_extension_is_invalid(source):
-        util.err("source file extension is invalid: '.so' expected")
+@click.option(
+    '-O', '--optimize', 'optimized',
+    is_flag=True,
+    help='Run peephole optimizations; constants are folded by `morty -c -O`.',
+)
+@click.option(
+    '--shake',
+    is_flag=True,
+    help='Drop code and memory unreachable from the entry point.',
+)
+@click.option(
+    '--reuse-slots',
+    is_flag=True,
+    help='Let variables with disjoint live ranges share memory slots.',
+)
+@click.option(
+    '--mem-format',
+    type=click.Choice(list(build.MEM_FORMATS)),
+    default='json',
+    show_default=True,
+    help='Encoding of the memory section.',
+)
+@click.option(
+    '--timings',
+    is_flag=True,
+    help='Report time spent in each stage.',
+)
+@click.option(
+    '--timings-format',
+    type=click.Choice(['text', 'json']),
+    default=None,
+    help='Report timings as text or JSON lines; implies --timings.',
+)
+def link(objects, target, optimized, shake, reuse_slots, mem_format,
+         timings, timings_format):
+    timings = _timings_format(timings, timings_format)
+    report = build.link(objects, target, optimized=optimized, shake=shake,
+                        reuse_slots=reuse_slots, mem_format=mem_format,
+                        timed=timings is not None)
+    if report.err:
+        util.err(report.err)
+    if shake:
+        click.echo(f'tree shaking saved {report.saved} bytes')
+    _print_timings(report, timings)
+
+
+@main.command(help='Assemble every program of a JSON lines manifest in one '
+                   'process, printing a JSON status line for each.')
+@click.argument(
+    'manifest',
+    type=click.File('r'),
+)
+@click.option(
+    '--archive',
+    type=click.Path(file_okay=True,
+                    dir_okay=False),
+    default=None,
+    help='Write all bytecode into this single file, indexed by target, '
+         'instead of into the targets.',
+)
+@click.option(
+    '--cache-dir',
+    type=click.Path(file_okay=False,
+                    dir_okay=True),
+    envvar='MORTY_CACHE_DIR',
+    help='Reuse cleaned and parsed source files from this directory.',
+)
+@click.option(
+    '-O', '--optimize', 'optimized',
+    is_flag=True,
+    help='Fold constant expressions and run peephole optimizations.',
+)
+@click.option(
+    '--shake',
+    is_flag=True,
+    help='Drop code and memory unreachable from the entry point.',
+)
+@click.option(
+    '--reuse-slots',
+    is_flag=True,
+    help='Let variables with disjoint live ranges share memory slots.',
+)
+@click.option(
+    '--mem-format',
+    type=click.Choice(list(build.MEM_FORMATS)),
+    default='json',
+    show_default=True,
+    help='Encoding of the memory section.',
+)
+@click.option(
+    '-MD', '--depfile',
+    is_flag=True,
+    help='Also write TARGET.d for make or ninja; not with --archive.',
+)
+def batch(manifest, archive, cache_dir, optimized, shake, reuse_slots,
+          mem_format, depfile):
+    import json
+    from contextlib import nullcontext
+    from . import batch as batches
+    from .Archive import Archive
+
+    if archive and depfile:
+        util.err('--depfile needs targets; it does not go with --archive')
+
+    options = dict(cache_dir=cache_dir, optimized=optimized, shake=shake,
+                   reuse_slots=reuse_slots, mem_format=mem_format,
+                   depfile=depfile)
+    total = failed = 0
+    with Archive(archive) if archive else nullcontext() as output:
+        for status in batches.run(manifest, output, **options):
+            total += 1
+            failed += bool(status['err'])
+            click.echo(json.dumps(status))
+
+    if failed:
+        util.err(f'{failed} of {total} entries failed to assemble')
+
+
+@main.command(help='Disassemble Rick bytecode into a readable listing.')
+@click.argument(
+    'bytecode',
+    type=click.Path(exists=True,
+                    file_okay=True,
+                    dir_okay=False),
+)
+@click.option(
+    '--output', '-o',
+    type=click.File('w'),
+    default='-',
+    help='Path to the listing [default: stdout].',
+)
+def dis(bytecode, output):
+    from . import dis as disassembler
+
+    try:
+        disassembler.disassemble(bytecode, output)
+    except ValueError as e:
+        util.err(f'[dis] {e}')
+
+
+@main.command(help='Run Rick bytecode on the reference interpreter.')
+@click.argument(
+    'bytecode',
+    type=click.Path(exists=True,
+                    file_okay=True,
+                    dir_okay=False),
+)
+@click.option(
+    '--stdin', 'stdin',
+    type=click.File('r'),
+    default='-',
+    help='Lines to feed to the program [default: stdin].',
+)
+@click.option(
+    '--counts',
+    is_flag=True,
+    help='Report how many times each opcode was executed.',
+)
+@click.option(
+    '--max-steps',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Stop the program after this many instructions.',
+)
+def run(bytecode, stdin, counts, max_steps):
+    from .Machine import Machine
+
+    with open(bytecode, 'rb') as file:
+        try:
+            machine = Machine(file.read(), stdin=stdin, stdout=sys.stdout)
+        except ValueError as e:
+            util.err(f'[run] {e}')
 
-    loader = Loader()
-    loader.load(source)
+    status = machine.run(max_steps)
+    sys.stdout.flush()
+    if counts:
+        for name, count in sorted(machine.counts.items(),
+                                  key=lambda item: -item[1]):
+            click.echo(f'{name:<5} {count}', err=True)
+        click.echo(f'total {machine.steps()}', err=True)
+    if machine.err:
+        util.print_err(f'[run] {machine.err}')
+    sys.exit(status)
 
-    if loader.err:
-        util.err(f'[loader] {loader.err}')
 
-    pre = Preprocessor()
-    pre.process(loader.code)
+@main.command(help='Serve assemble requests on a Unix socket; use '
+                   'morty-client to send them.')
+@click.option(
+    '--socket', 'path',
+    type=click.Path(file_okay=True,
+                    dir_okay=False),
+    default=None,
+    help='Path to the socket [default: $MORTY_SOCKET, else morty.sock in '
+         '$XDG_RUNTIME_DIR or the temporary directory].',
+)
+def serve(path):
+    from .Server import Server
+    from .client import socket_path
 
-    if pre.err:
-        util.err(f'[preprocessor] {pre.err}')
+    path = path or socket_path()
+    try:
+        server = Server(path)
+    except OSError as e:
+        util.err(f'[serve] {e}')
 
-    make.write(
-        code=make.code(
-            mem=make.mem(*pre.memory),
-            ins=pre.instructions
-        ),
-        path=target
-    )
+    click.echo(f'listening on {path}')
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
 
 
 if __name__ == '__main__':
-    assemble()
+    main()
@@ -0,0 +1,125 @@
+""" Thin client for a running `morty serve` daemon.
+
+Only the standard library is imported here, so forwarding a request costs
+little more than starting the interpreter. When no server is listening the
+client assembles in process instead.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+def socket_path():
+    """ Return the default path of the server socket. """
+    path = os.environ.get('MORTY_SOCKET')
+    if path:
+        return path
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, 'morty.sock')
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f'morty-{os.getuid()}.sock')
+
+
+def request(payload, path=None, timeout=None):
+    """ Send one request to the server and return its response.
+
+    Raises OSError when no server is listening on `path`.
+    """
+    with send(payload, path, timeout) as conn:
+        return receive(conn)
+
+
+def send(payload, path=None, timeout=None):
+    """ Send one request to the server and return the open connection.
+
+    Raises OSError when no server is listening on `path`; the request has
+    then not reached a server.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(timeout)
+        conn.connect(path or socket_path())
+        conn.sendall(json.dumps(payload).encode() + b'\n')
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+def receive(conn):
+    """ Return the response to the request sent on `conn`. """
+    with conn.makefile('rb') as response:
+        line = response.readline()
+    if not line:
+        raise ConnectionError('server closed the connection')
+    return json.loads(line)
+
+
+def assemble_request(source, target, text=None, **options):
+    """ Build an assemble request for `source`, relative to the cwd. """
+    payload = {
+        'op': 'assemble',
+        'source': os.path.abspath(source),
+        'target': os.path.abspath(target),
+        'options': options,
+    }
+    if text is not None:
+        payload['text'] = text
+    return payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='morty-client',
+        description='Assemble SmallO code through a running morty server.')
+    parser.add_argument('source',
+                        help="path to the source, or '-' to read stdin")
+    parser.add_argument('--target', default='out.rk')
+    parser.add_argument('--socket', default=None)
+    parser.add_argument('-O', '--optimize', dest='optimized',
+                        action='store_true')
+    parser.add_argument('--shake', action='store_true')
+    parser.add_argument('--reuse-slots', action='store_true')
+    parser.add_argument('--mem-format', choices=('json', 'binary'),
+                        default='json')
+    parser.add_argument('-MD', '--depfile', action='store_true',
+                        help='also write TARGET.d for make or ninja')
+    args = parser.parse_args(argv)
+
+    source, text = args.source, None
+    if source == '-':
+        source, text = 'stdin.so', sys.stdin.read()
+
+    options = dict(optimized=args.optimized, shake=args.shake,
+                   reuse_slots=args.reuse_slots, mem_format=args.mem_format,
+                   depfile=args.depfile)
+    payload = assemble_request(source, args.target, text, **options)
+    try:
+        conn = send(payload, args.socket)
+    except OSError:
+        response = _assemble_locally(payload)
+    else:
+        # The server has the request now: running it again here could
+        # only repeat whatever went wrong there.
+        with conn:
+            try:
+                response = receive(conn)
+            except (OSError, ValueError) as e:
+                response = {'err': f'[server] {e}'}
+
+    if response['err']:
+        print(f'Error: {response["err"].lower()}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def _assemble_locally(payload):
+    from .Server import assemble
+    return assemble(payload)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
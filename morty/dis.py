@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+import json
+import mmap
+import struct
+
+from .Op import Op
+from . import read
+
+
+""" Byte values of the opcodes the disassembler treats specially. """
+PUSH = Op.PUSH[0]
+POP = Op.POP[0]
+DIRECT_JUMPS = {Op.JUMP[0], Op.BR[0]}
+CONDITIONAL_JUMPS = {Op.JMPT[0], Op.JMPF[0], Op.BRT[0], Op.BRF[0]}
+
+SLOT = struct.Struct('>I')
+
+
+@contextmanager
+def image(path):
+    """ Map a .rk file into memory read-only. """
+    with open(path, 'rb') as file:
+        try:
+            buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            buf = file.read()
+            yield buf
+            return
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def instructions(buf, offset):
+    """ Yield (offset, opcode, slot) for every instruction in `buf`.
+
+    Instructions are decoded in place through a memoryview; the slot is None
+    for opcodes without an operand.
+    """
+    view = memoryview(buf)
+    unpack_from = SLOT.unpack_from
+    end = len(view)
+    try:
+        while offset < end:
+            op = view[offset]
+            if op == PUSH or op == POP:
+                if offset + 5 > end:
+                    raise ValueError(f'truncated operand at {offset}')
+                yield offset, op, unpack_from(view, offset + 1)[0]
+                offset += 5
+            else:
+                yield offset, op, None
+                offset += 1
+    finally:
+        view.release()
+
+
+def labels(buf, offset, memory):
+    """ Return {address: slot} for the slots jumps go through. """
+    found = {}
+    last = second_last = None
+    for _, op, slot in instructions(buf, offset):
+        target = None
+        if op in DIRECT_JUMPS:
+            target = last
+        elif op in CONDITIONAL_JUMPS:
+            target = second_last
+        if target is not None and target < len(memory) \
+                and isinstance(memory[target], int):
+            found.setdefault(memory[target], target)
+        second_last, last = last, slot if op == PUSH else None
+    return found
+
+
+def label_name(slot):
+    return f'L{slot}'
+
+
+def listing(buf):
+    """ Yield the lines of a listing of the .rk image in `buf`. """
+    memory, start = read.code(buf)
+    at = labels(buf, start, memory)
+    label_slots = set(at.values())
+
+    yield f'; memory: {len(memory)} slots'
+    for slot, value in enumerate(memory):
+        if slot in label_slots:
+            comment = f'label {label_name(slot)}'
+        else:
+            comment = 'variable' if value is None else json.dumps(value)
+        yield f';   {slot:>6}  {comment}'
+
+    yield f'; code: {len(buf) - start} bytes'
+    for offset, op, slot in instructions(buf, start):
+        address = offset - start
+        if address in at:
+            yield f'{label_name(at[address])}:'
+
+        name = Op.name(op) or f'?{op:02x}'
+        if slot is None:
+            yield f'  {address:08x}  {name}'
+            continue
+
+        if slot in label_slots:
+            comment = label_name(slot)
+        elif slot < len(memory) and memory[slot] is not None:
+            comment = json.dumps(memory[slot])
+        else:
+            comment = f'm{slot}'
+        yield f'  {address:08x}  {name:<5} {slot:<6} ; {comment}'
+
+
+def disassemble(path, out):
+    """ Write the listing of the .rk file at `path` to the stream `out`. """
+    with image(path) as buf:
+        chunk = []
+        for line in listing(buf):
+            chunk.append(line)
+            if len(chunk) >= 4096:
+                out.write('\n'.join(chunk) + '\n')
+                chunk.clear()
+        if chunk:
+            out.write('\n'.join(chunk) + '\n')
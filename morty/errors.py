@@ -0,0 +1,53 @@
+""" Exceptions raised by the embedding API in morty.api.
+
+Each stage of the pipeline has its own exception, so callers can tell a
+missing include from a typo in an instruction without parsing messages.
+"""
+
+
+class AssemblyError(Exception):
+    """ AssemblyError is raised when a program cannot be assembled.
+
+    `stage` names the stage that failed, `message` says what went wrong and
+    `source` is the program being assembled.
+    """
+    stage = None
+
+    def __init__(self, message, source=None):
+        # Both go to args, so errors survive the trip back from a process.
+        super().__init__(message, source)
+        self.message = message
+        self.source = source
+
+    def __str__(self):
+        return f'[{self.stage}] {self.message}'
+
+
+class SourceError(AssemblyError):
+    """ The source cannot be assembled at all, e.g. for its extension. """
+    stage = 'source'
+
+
+class LoaderError(AssemblyError):
+    """ A file is missing or an include is malformed. """
+    stage = 'loader'
+
+
+class PreprocessorError(AssemblyError):
+    """ An instruction or label is invalid. """
+    stage = 'preprocessor'
+
+
+class MakeError(AssemblyError):
+    """ The program cannot be encoded, e.g. a value overflows an i32. """
+    stage = 'make'
+
+
+class LinkError(AssemblyError):
+    """ Objects cannot be linked, e.g. for an unresolved include. """
+    stage = 'link'
+
+
+""" Exceptions by the name of the stage that raises them. """
+ERRORS = {error.stage: error for error in (
+    SourceError, LoaderError, PreprocessorError, MakeError, LinkError)}
@@ -0,0 +1,74 @@
+from .Parser import State
+
+
+""" Rick stores integers as signed 32-bit values. """
+I32_MIN = -2 ** 31
+I32_MAX = 2 ** 31 - 1
+
+
+def div(x, y):
+    """ Integer division truncating towards zero, as Rick does. """
+    q = abs(x) // abs(y)
+    return q if (x < 0) == (y < 0) else -q
+
+
+def mod(x, y):
+    """ Remainder taking the sign of the dividend, as Rick does. """
+    return x - y * div(x, y)
+
+
+def boolean(x):
+    return int(bool(x))
+
+
+""" Operations on two integers, keyed by opcode. """
+INTEGER_OPERATIONS = {
+    'add': lambda x, y: x + y,
+    'sub': lambda x, y: x - y,
+    'mul': lambda x, y: x * y,
+    'div': div,
+    'mod': mod,
+    'gth': lambda x, y: boolean(x > y),
+    'lth': lambda x, y: boolean(x < y),
+    'geq': lambda x, y: boolean(x >= y),
+    'leq': lambda x, y: boolean(x <= y),
+    'eq':  lambda x, y: boolean(x == y),
+    'neq': lambda x, y: boolean(x != y),
+    'and': lambda x, y: boolean(x and y),
+    'or':  lambda x, y: boolean(x or y),
+}
+
+DIVISIONS = ('div', 'mod')
+
+
+def fold_instruction(opcode, operand):
+    """ Compute instructions on literals at assembly time.
+
+    Returns an equivalent (opcode, operand) pair, which is a 'put' of the
+    result when the instruction could be folded and the original otherwise.
+    Division by zero and results outside of the i32 range are left for Rick
+    to deal with.
+    """
+    if opcode == 'not':
+        (kind, x), name = operand
+        if kind == State.INTEGER:
+            return _put(State.INTEGER, boolean(not x), name)
+
+    elif opcode == 'con':
+        (x_kind, x), (y_kind, y), name = operand
+        if x_kind == y_kind == State.STRING:
+            return _put(State.STRING, x + y, name)
+
+    elif opcode in INTEGER_OPERATIONS:
+        (x_kind, x), (y_kind, y), name = operand
+        if x_kind == y_kind == State.INTEGER \
+                and not (opcode in DIVISIONS and y == 0):
+            result = INTEGER_OPERATIONS[opcode](x, y)
+            if I32_MIN <= result <= I32_MAX:
+                return _put(State.INTEGER, result, name)
+
+    return opcode, operand
+
+
+def _put(kind, value, name):
+    return 'put', ((kind, value), name)
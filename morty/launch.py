@@ -0,0 +1,59 @@
+""" Entry point of the morty command.
+
+Most invocations assemble one source with at most a --target and -MD,
+typically from a build system running morty many times over. Those are
+handled here directly, so they never import click; everything else goes
+through cli.
+"""
+import os
+import sys
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    simple = _simple_assemble(argv)
+    if simple is None:
+        from .cli import main as cli
+        return cli(args=argv, prog_name='morty')
+
+    from . import build
+    from . import util
+
+    source, target, depfile = simple
+    report = build.assemble(source, target, depfile=depfile,
+                            cache_dir=os.environ.get('MORTY_CACHE_DIR'))
+    if report.err:
+        util.err(report.err)
+    return 0
+
+
+def _simple_assemble(argv):
+    """ Return (source, target, depfile) when `argv` is
+    `SOURCE.so [--target T] [-MD]`. """
+    source = target = None
+    depfile = False
+    args = iter(argv)
+    for arg in args:
+        if arg in ('-MD', '--depfile'):
+            depfile = True
+        elif arg == '--target':
+            target = next(args, None)
+            if target is None:
+                return None
+        elif arg.startswith('--target='):
+            target = arg[len('--target='):]
+        elif arg.startswith('-') or source is not None:
+            return None
+        else:
+            source = arg
+
+    if source is None or not source.endswith('.so'):
+        return None
+
+    if not os.path.isfile(source):
+        return None
+    return source, target or 'out.rk', depfile
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import json
+import struct
 
 from .Op import Op
 
@@ -6,11 +7,48 @@ from .Op import Op
 SEP = b'\0'
 WATERMARK = b'Rick' + SEP
 
+""" Memory slot operands are unsigned 32-bit big-endian integers. """
+SLOT = struct.Struct('>I')
+
+""" The binary memory section starts with its magic and version byte, then
+the number of entries, then one tagged entry per memory slot. """
+MEM_MAGIC = b'RkM'
+MEM_VERSION = 1
+MEM_HEADER = struct.Struct('>3sBI')
+MEM_NULL = 0
+MEM_I32 = 1
+MEM_STR = 2
+
+MEM_NULL_ENTRY = bytes([MEM_NULL])
+MEM_I32_ENTRY = struct.Struct('>Bi')
+MEM_STR_ENTRY = struct.Struct('>BI')
+
 
 def mem(*space):
     return json.dumps(space).encode() + SEP
 
 
+def mem_bin(*space):
+    """ Encode memory in the binary format.
+
+    Integers must fit in an i32; strings are stored as length-prefixed UTF-8.
+    """
+    parts = [MEM_HEADER.pack(MEM_MAGIC, MEM_VERSION, len(space))]
+    for value in space:
+        if value is None:
+            parts.append(MEM_NULL_ENTRY)
+        elif isinstance(value, int):
+            try:
+                parts.append(MEM_I32_ENTRY.pack(MEM_I32, value))
+            except struct.error:
+                raise ValueError(f'memory value {value} does not fit in i32')
+        else:
+            data = value.encode()
+            parts.append(MEM_STR_ENTRY.pack(MEM_STR, len(data)))
+            parts.append(data)
+    return b''.join(parts)
+
+
 def ins(*space):
     return b''.join(space) + Op.END
 
@@ -23,6 +61,18 @@ def i32(n):
     return n.to_bytes(4, 'big')
 
 
+def deps(target, paths):
+    """ Return a Makefile rule making `target` depend on `paths`. """
+    lines = [f'{_escape_make(target)}:']
+    lines.extend(f' {_escape_make(path)}' for path in paths)
+    return (' \\\n'.join(lines) + '\n').encode()
+
+
+def _escape_make(path):
+    return str(path).replace('$', '$$').replace('#', '\\#') \
+        .replace(' ', '\\ ')
+
+
 def write(code, path):
     with open(path, 'wb') as file:
         file.write(code)
@@ -0,0 +1,312 @@
+from .Op import Op
+
+
+""" Jumps whose target is a single PUSH away, and conditional ones whose
+target sits below the pushed condition. """
+DIRECT_JUMPS = (Op.JUMP, Op.BR)
+CONDITIONAL_JUMPS = (Op.JMPT, Op.JMPF, Op.BRT, Op.BRF)
+JUMPS = DIRECT_JUMPS + CONDITIONAL_JUMPS
+
+""" Opcodes after which execution never reaches the next instruction. """
+TERMINATORS = (Op.JUMP, Op.END, Op.BACK, Op.ERR)
+
+MAX_PASSES = 16
+
+
+def peephole(program):
+    """ Run the peephole passes over `program` until none of them applies.
+
+    Removing code shifts addresses, so programs that jump through variables,
+    which may hold addresses computed at run time, are left alone.
+    """
+    if has_computed_jumps(program):
+        return
+
+    for _ in range(MAX_PASSES):
+        changed = thread_jumps(program)
+        changed |= remove_jumps_to_next(program)
+        changed |= remove_redundant_pairs(program)
+        changed |= remove_dead_code(program)
+        if not changed:
+            break
+
+
+def jump_sites(program):
+    """ Yield (index of the PUSH of the target, index of the jump) pairs. """
+    code = program.code
+    for index, (op, _) in enumerate(code):
+        if op in DIRECT_JUMPS and index >= 1:
+            yield index - 1, index
+        elif op in CONDITIONAL_JUMPS and index >= 2:
+            yield index - 2, index
+
+
+def has_computed_jumps(program):
+    """ Tell whether any jump goes through a variable or a reassigned label.
+    """
+    labels = static_labels(program)
+    for index, _ in jump_sites(program):
+        op, slot = program.code[index]
+        if op != Op.PUSH or slot not in labels:
+            return True
+    return False
+
+
+def static_labels(program):
+    """ Return label slots that are never reassigned at run time. """
+    return program.labels - program.written()
+
+
+def thread_jumps(program):
+    """ Retarget jumps to labels that immediately jump somewhere else. """
+    labels = static_labels(program)
+    code = program.code
+
+    def forward(slot):
+        seen = {slot}
+        while True:
+            target = program.memory[slot]
+            if target + 1 >= len(code) \
+                    or code[target][0] != Op.PUSH \
+                    or code[target + 1][0] != Op.JUMP \
+                    or code[target][1] not in labels \
+                    or code[target][1] in seen:
+                return slot
+            slot = code[target][1]
+            seen.add(slot)
+
+    changed = False
+    for index, _ in jump_sites(program):
+        op, slot = code[index]
+        if op != Op.PUSH or slot not in labels:
+            continue
+        target = forward(slot)
+        if target != slot:
+            code[index][1] = target
+            changed = True
+    return changed
+
+
+def remove_jumps_to_next(program):
+    """ Remove unconditional jumps to the instruction right after them. """
+    labels = static_labels(program)
+    code = program.code
+    removed = set()
+
+    for index, jump in jump_sites(program):
+        slot = code[index][1]
+        if code[jump][0] == Op.JUMP and slot in labels \
+                and program.memory[slot] == index + 2:
+            removed.update((index, index + 1))
+
+    program.remove(removed)
+    return bool(removed)
+
+
+def remove_redundant_pairs(program):
+    """ Remove PUSH x / POP x self-moves and PUSH x / DROP pairs.
+
+    A POP x / PUSH x pair, which `put a x` followed by an instruction
+    reading x first assembles to, only leaves the value on the stack. It is
+    removed too when x is a variable nothing reads afterwards.
+    """
+    targets = program.targets()
+    code = program.code
+    removed = set()
+    bit = live_out = None
+
+    index = 0
+    while index + 1 < len(code):
+        (op, slot), (next_op, next_slot) = code[index], code[index + 1]
+        if index + 1 in targets:
+            redundant = False
+        elif op == Op.PUSH:
+            redundant = next_op == Op.DROP or \
+                next_op == Op.POP and next_slot == slot
+        elif op == Op.POP and next_op == Op.PUSH and next_slot == slot:
+            if bit is None:
+                bit, _, _, live_out = liveness(program)
+            redundant = slot in bit and not live_out[index + 1] & bit[slot]
+        else:
+            redundant = False
+
+        if redundant:
+            removed.update((index, index + 1))
+            index += 2
+        else:
+            index += 1
+
+    program.remove(removed)
+    return bool(removed)
+
+
+def remove_dead_code(program):
+    """ Remove code between an unconditional jump or end and a label. """
+    targets = program.targets()
+    removed = set()
+
+    dead = False
+    for index, (op, _) in enumerate(program.code):
+        if index in targets:
+            dead = False
+        if dead:
+            removed.add(index)
+        elif op in TERMINATORS:
+            dead = True
+
+    program.remove(removed)
+    return bool(removed)
+
+
+def successors(program):
+    """ Return, for every instruction, the indices execution may go to next.
+
+    BACK may return to the instruction after any branch. Only meaningful
+    for programs without computed jumps.
+    """
+    code = program.code
+    jumps = {jump: program.memory[code[index][1]]
+             for index, jump in jump_sites(program)}
+    returns = [index + 1 for index, (op, _) in enumerate(code)
+               if op in (Op.BR, Op.BRT, Op.BRF)]
+
+    result = []
+    for index, (op, _) in enumerate(code):
+        following = []
+        if index in jumps:
+            following.append(jumps[index])
+        if op == Op.BACK:
+            following.extend(returns)
+        elif op not in TERMINATORS:
+            following.append(index + 1)
+        result.append([i for i in following if i < len(code)])
+    return result
+
+
+def shake(program):
+    """ Remove code unreachable from the entry point and the memory it used.
+
+    Labels pushed anywhere but right before a jump may be jumped to through
+    a variable later, so their code is kept. Programs with computed jumps
+    are left alone. Returns the number of instructions removed.
+    """
+    if has_computed_jumps(program):
+        return 0
+
+    code = program.code
+    sites = dict(jump_sites(program))
+    following = successors(program)
+
+    pending = [0] + [
+        program.memory[slot]
+        for index, (op, slot) in enumerate(code)
+        if op == Op.PUSH and slot in program.labels and index not in sites
+    ]
+    reachable = set()
+    while pending:
+        index = pending.pop()
+        if index in reachable or index >= len(code):
+            continue
+        reachable.add(index)
+        pending.extend(following[index])
+
+    removed = set(range(len(code))) - reachable
+    program.remove(removed)
+    program.compact()
+    return len(removed)
+
+
+def share_slots(program):
+    """ Let variables whose live ranges never overlap share a memory slot.
+
+    Liveness is computed per instruction over the control flow graph, with
+    sets of variables kept as integer bit masks. Variables that may be read
+    before they are first assigned keep a slot of their own. Programs with
+    computed jumps are left alone. Returns the number of slots saved.
+    """
+    if has_computed_jumps(program):
+        return 0
+
+    code = program.code
+    bit, defs, live_in, live_out = liveness(program)
+    variables = list(bit)
+
+    interference = {slot: 0 for slot in variables}
+    for index, (_, slot) in enumerate(code):
+        if defs[index]:
+            others = live_out[index] & ~defs[index]
+            interference[slot] |= others
+            while others:
+                lowest = others & -others
+                other = variables[lowest.bit_length() - 1]
+                interference[other] |= bit[slot]
+                others ^= lowest
+
+    entry = live_in[0] if code else 0
+    mapping = {slot: slot for slot in range(len(program.memory))}
+    shared = []
+    for slot in variables:
+        if not entry & bit[slot]:
+            for members in shared:
+                if not members[0] & interference[slot]:
+                    members[0] |= bit[slot]
+                    mapping[slot] = members[1]
+                    break
+            else:
+                shared.append([bit[slot], slot])
+
+    saved = sum(1 for slot in variables if mapping[slot] != slot)
+    if saved:
+        program.renumber(mapping)
+        program.compact()
+    return saved
+
+
+def liveness(program):
+    """ Return the variables of `program` and their liveness.
+
+    Variables are slots holding no initial value, other than labels. They
+    are returned as {slot: bit}, followed by the variables each instruction
+    assigns, and those live before and after it, as integer bit masks.
+    Only meaningful for programs without computed jumps.
+    """
+    code = program.code
+    variables = sorted(
+        slot for slot in program.used()
+        if slot not in program.labels and program.memory[slot] is None)
+    bit = {slot: 1 << n for n, slot in enumerate(variables)}
+
+    uses = [0] * len(code)
+    defs = [0] * len(code)
+    for index, (op, slot) in enumerate(code):
+        if slot in bit:
+            if op == Op.PUSH:
+                uses[index] = bit[slot]
+            else:
+                defs[index] = bit[slot]
+
+    following = successors(program)
+    preceding = [[] for _ in code]
+    for index, indices in enumerate(following):
+        for i in indices:
+            preceding[i].append(index)
+
+    live_in = [0] * len(code)
+    live_out = [0] * len(code)
+    pending = list(range(len(code)))
+    queued = set(pending)
+    while pending:
+        index = pending.pop()
+        queued.discard(index)
+        out = 0
+        for i in following[index]:
+            out |= live_in[i]
+        live_out[index] = out
+        live = uses[index] | (out & ~defs[index])
+        if live != live_in[index]:
+            live_in[index] = live
+            for i in preceding[index]:
+                if i not in queued:
+                    queued.add(i)
+                    pending.append(i)
+    return bit, defs, live_in, live_out
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+import cProfile
+import pstats
+
+
+@contextmanager
+def profiled(path):
+    """ Profile the body and save the results next to `path`.
+
+    `path` receives the pstats dump, readable with pstats or snakeviz, and
+    `path`.collapsed receives collapsed stacks for flamegraph tools.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        with open(f'{path}.collapsed', 'w') as file:
+            file.writelines(f'{line}\n' for line in
+                            collapsed(pstats.Stats(profile)))
+
+
+def frame_name(func):
+    filename, line, name = func
+    return f'{name} ({filename}:{line})'
+
+
+def collapsed(stats):
+    """ Yield 'frame;frame;... microseconds' lines from pstats.Stats.
+
+    cProfile only records caller/callee pairs, so stacks are rebuilt from the
+    roots of the call graph and the self time of a function is split between
+    its callers in proportion to the time each of them spent in it. Recursive
+    calls are folded into the first occurrence of the function on a stack.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    totals = {}
+    for root in roots:
+        _walk(root, 1.0, (), entries, callees, totals)
+
+    for stack, seconds in totals.items():
+        microseconds = round(seconds * 1e6)
+        if microseconds:
+            yield f'{";".join(stack)} {microseconds}'
+
+
+def _walk(func, share, stack, entries, callees, totals):
+    stack = stack + (frame_name(func),)
+    totals[stack] = totals.get(stack, 0.0) + entries[func][2] * share
+
+    for callee, edge in callees.get(func, ()):
+        # Paths under a microsecond are dropped to keep the walk bounded.
+        if frame_name(callee) in stack or edge * share < 1e-6:
+            continue
+        _walk(callee, share * edge / entries[callee][3], stack,
+              entries, callees, totals)
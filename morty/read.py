@@ -0,0 +1,72 @@
+import json
+
+from . import make
+
+
+""" Readers mirror the writers in make. Each takes a buffer (bytes or an
+mmap) and the offset of a section, and returns the decoded section together
+with the offset right after it. """
+
+
+def code(buf):
+    """ Split a .rk image into (memory, offset of the instructions). """
+    if buf[:len(make.WATERMARK)] != make.WATERMARK:
+        raise ValueError('not a Rick bytecode file: watermark missing')
+    return mem_any(buf, len(make.WATERMARK))
+
+
+def mem_any(buf, offset):
+    """ Read a memory section in whichever format it was written. """
+    if buf[offset:offset + len(make.MEM_MAGIC)] == make.MEM_MAGIC:
+        return mem_bin(buf, offset)
+    return mem(buf, offset)
+
+
+def mem(buf, offset):
+    end = buf.find(make.SEP, offset)
+    if end < 0:
+        raise ValueError('memory section is not terminated')
+    return json.loads(buf[offset:end]), end + 1
+
+
+def mem_bin(buf, offset):
+    end = len(buf)
+    if offset + make.MEM_HEADER.size > end:
+        raise ValueError('memory section is truncated')
+    magic, version, count = make.MEM_HEADER.unpack_from(buf, offset)
+    if magic != make.MEM_MAGIC:
+        raise ValueError('memory section magic missing')
+    if version != make.MEM_VERSION:
+        raise ValueError(f'unsupported memory section version {version}')
+    offset += make.MEM_HEADER.size
+
+    i32_entry = make.MEM_I32_ENTRY.unpack_from
+    str_entry = make.MEM_STR_ENTRY.unpack_from
+    i32_size = make.MEM_I32_ENTRY.size
+    str_size = make.MEM_STR_ENTRY.size
+    space = []
+    append = space.append
+    for _ in range(count):
+        if offset >= end:
+            raise ValueError('memory section is truncated')
+        tag = buf[offset]
+        if tag == make.MEM_NULL:
+            append(None)
+            offset += 1
+        elif tag == make.MEM_I32:
+            if offset + i32_size > end:
+                raise ValueError('memory section is truncated')
+            append(i32_entry(buf, offset)[1])
+            offset += i32_size
+        elif tag == make.MEM_STR:
+            if offset + str_size > end:
+                raise ValueError('memory section is truncated')
+            length = str_entry(buf, offset)[1]
+            offset += str_size
+            if offset + length > end:
+                raise ValueError('memory section is truncated')
+            append(str(buf[offset:offset + length], 'utf-8'))
+            offset += length
+        else:
+            raise ValueError(f'unknown memory entry tag {tag}')
+    return space, offset
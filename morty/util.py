@@ -1,13 +1,61 @@
+from functools import lru_cache
+import glob
 import sys
 from pathlib import Path
 
-import termcolor as tc
-
 
 def err(msg):
-    tc.cprint(f'Error: {msg.lower()}', 'red')
+    print_err(msg)
     sys.exit(1)
 
 
+def print_err(msg):
+    _termcolor().cprint(f'Error: {msg.lower()}', 'red')
+
+
+@lru_cache(maxsize=None)
+def _termcolor():
+    """ Import and set up colour support on the first error.
+
+    Keeping colorama and termcolor off the import path saves every
+    successful run their startup cost.
+    """
+    import colorama
+    import termcolor
+
+    colorama.init()
+    return termcolor
+
+
 def source_file_extension_is_invalid(src):
     return Path(src).suffix != '.so'
+
+
+def expand_sources(patterns):
+    """ Expand files, directories and globs into (source, name) pairs.
+
+    Directories contribute every '.so' file beneath them, named relative to
+    the directory; files and glob matches are named after themselves.
+    """
+    sources = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            sources.extend(
+                (src, src.relative_to(path))
+                for src in sorted(path.rglob('*.so')))
+        elif path.exists():
+            sources.append((path, Path(path.name)))
+        elif glob.has_magic(pattern):
+            sources.extend(
+                (Path(match), Path(Path(match).name))
+                for match in sorted(glob.glob(pattern, recursive=True)))
+        else:
+            err(f"source '{pattern}' does not exist")
+    return sources
+
+
+def target_path(source, name, out_dir=None, suffix='.rk'):
+    if out_dir is None:
+        return source.with_suffix(suffix)
+    return Path(out_dir) / name.with_suffix(suffix)
@@ -1,8 +1,14 @@
+import re
+
 from setuptools import setup, find_packages
 
+
+with open('morty/__init__.py') as file:
+    version = re.search(r"^__version__ = '(.+)'$", file.read(), re.M)[1]
+
 setup(
     name='morty-smallo-assembler',
-    version='0.1.0',
+    version=version,
     author='Viktor A. Rozenko Voitenko',
     author_email='sharp.vik@gmail.com',
     description='Morty is a snappy and lightweight assembler for the SmallO assembly.',
@@ -17,6 +23,7 @@ setup(
     ],
     entry_points="""
         [console_scripts]
-        morty=morty.cli:assemble
+        morty=morty.launch:main
+        morty-client=morty.client:main
     """,
 )
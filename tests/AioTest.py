@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+import morty
+from morty import aio
+
+
+class AioTest(IsolatedAsyncioTestCase):
+    SOURCE = 'examples/exe/year_of_birth.so'
+
+    def setUp(self) -> None:
+        self.expected = morty.assemble_file(self.SOURCE)
+
+    async def test_matches_synchronous_assembly(self):
+        self.assertEqual(self.expected, await aio.assemble_file(self.SOURCE))
+        self.assertEqual(self.expected, await aio.assemble_source(
+            Path(self.SOURCE).read_text(), name=self.SOURCE))
+
+    async def test_reads_includes_concurrently(self):
+        # Every request waits in its resolver until all of them got there,
+        # which only happens when their reads overlap.
+        requests = 20
+        waiting = []
+        everyone = asyncio.Event()
+
+        async def resolver(path):
+            waiting.append(path)
+            if len(waiting) == requests:
+                everyone.set()
+            await everyone.wait()
+            return Path(path).read_text()
+
+        images = await asyncio.wait_for(asyncio.gather(*[
+            aio.assemble_file(self.SOURCE, resolver)
+            for _ in range(requests)]), timeout=10)
+        self.assertEqual([self.expected] * requests, images)
+
+    async def test_takes_mappings_and_plain_callables(self):
+        files = {'examples/lib/factorial.so':
+                 Path('examples/lib/factorial.so').read_text()}
+        self.assertEqual(self.expected,
+                         await aio.assemble_file(self.SOURCE, files))
+        self.assertEqual(self.expected,
+                         await aio.assemble_file(self.SOURCE, files.get))
+
+    async def test_assembles_in_a_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            self.assertEqual(self.expected, await aio.assemble_file(
+                self.SOURCE, executor=pool))
+            with self.assertRaises(morty.PreprocessorError) as caught:
+                await aio.assemble_source('nop 1', {}, executor=pool)
+            self.assertEqual('main.so', caught.exception.source)
+
+    async def test_times_out(self):
+        async def never(path):
+            await asyncio.Event().wait()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await aio.assemble_source('>"lib.so"', never, timeout=0.05)
+
+    async def test_raises_structured_errors(self):
+        with self.assertRaises(morty.LoaderError):
+            await aio.assemble_file('missing.so')
+        with self.assertRaises(morty.LoaderError):
+            await aio.assemble_source('>"missing.so"', {})
+        with self.assertRaises(morty.LoaderError):
+            await aio.assemble_source('>"', {})
+        # Reading through a file fails with NotADirectoryError.
+        with self.assertRaises(morty.LoaderError):
+            await aio.assemble_file(f'{self.SOURCE}/main.so')
+        with self.assertRaises(morty.LoaderError):
+            await aio.assemble_source(f'>"{Path(self.SOURCE).name}/lib.so"',
+                                      name=self.SOURCE)
@@ -0,0 +1,58 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import morty
+from morty import build
+
+
+class ApiTest(TestCase):
+    SOURCE = 'examples/exe/year_of_birth.so'
+    FILES = {'lib/factorial.so': Path('examples/lib/factorial.so').read_text()}
+
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.target = Path(self.dir.name, 'out.rk')
+        build.assemble(self.SOURCE, self.target)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_assembles_source_with_virtual_includes(self):
+        text = Path(self.SOURCE).read_text()
+        self.assertEqual(self.target.read_bytes(), morty.assemble_source(
+            text, self.FILES, name='exe/year_of_birth.so'))
+        self.assertEqual(self.target.read_bytes(), morty.assemble_source(
+            text, self.FILES.get, name='exe/year_of_birth.so'))
+
+    def test_assembles_file(self):
+        self.assertEqual(self.target.read_bytes(),
+                         morty.assemble_file(self.SOURCE))
+        self.assertEqual(self.target.read_bytes(),
+                         morty.assemble_file(self.SOURCE, lambda path:
+                                             Path(path).read_text()))
+
+    def test_passes_options_on(self):
+        build.assemble(self.SOURCE, self.target, optimized=True,
+                       mem_format='binary')
+        self.assertEqual(self.target.read_bytes(), morty.assemble_file(
+            self.SOURCE, optimized=True, mem_format='binary'))
+
+    def test_raises_errors_of_each_stage(self):
+        for error, text, name in (
+                (morty.SourceError, 'nl', 'main.txt'),
+                (morty.LoaderError, '>"missing.so"', 'main.so'),
+                (morty.PreprocessorError, 'nop 1', 'main.so'),
+                (morty.MakeError, 'put 4294967296 x', 'main.so')):
+            with self.assertRaises(error) as caught:
+                morty.assemble_source(text, {}, name=name,
+                                      mem_format='binary')
+            self.assertIsInstance(caught.exception, morty.AssemblyError)
+            self.assertEqual(error.stage, caught.exception.stage)
+            self.assertEqual(name, caught.exception.source)
+
+    def test_does_not_fall_back_to_the_file_system(self):
+        with self.assertRaises(morty.LoaderError):
+            morty.assemble_file(self.SOURCE, {})
+        with self.assertRaises(morty.LoaderError):
+            morty.assemble_file('missing.so', {})
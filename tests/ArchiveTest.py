@@ -0,0 +1,42 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import Archive
+
+
+class ArchiveTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.path = Path(self.dir.name, 'all.rka')
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_indexes_images_by_name(self):
+        with Archive.Archive(self.path) as archive:
+            self.assertEqual((4, 3), archive.add('a.rk', b'one'))
+            self.assertEqual((7, 0), archive.add('b.rk', b''))
+            archive.add('c/d.rk', b'three')
+
+        buf = self.path.read_bytes()
+        index = Archive.index(buf)
+        self.assertEqual(['a.rk', 'b.rk', 'c/d.rk'], list(index))
+        offset, size = index['c/d.rk']
+        self.assertEqual(b'three', buf[offset:offset + size])
+
+    def test_refuses_duplicate_names(self):
+        with Archive.Archive(self.path) as archive:
+            archive.add('a.rk', b'one')
+            with self.assertRaises(ValueError):
+                archive.add('a.rk', b'two')
+        self.assertEqual({'a.rk': (4, 3)},
+                         Archive.index(self.path.read_bytes()))
+
+    def test_rejects_other_files(self):
+        with Archive.Archive(self.path) as archive:
+            archive.add('a.rk', b'one')
+        buf = self.path.read_bytes()
+        for broken in (b'Rick\0', buf[:-1], buf[:6]):
+            with self.assertRaises(ValueError):
+                Archive.index(broken)
@@ -0,0 +1,105 @@
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import Archive
+from morty import batch
+from morty import build
+
+
+class BatchTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.out = Path(os.path.relpath(self.dir.name))
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_assembles_paths_and_inline_sources(self):
+        statuses = list(batch.run(self._manifest(
+            {'source': 'examples/exe/year_of_birth.so',
+             'target': str(self.out / 'yob.rk')},
+            {'source': 'examples/inline.so', 'text': '>"lib/pow.so"\nnl',
+             'target': str(self.out / 'inline/pow.rk'),
+             'options': {'optimized': True}},
+        )))
+
+        self.assertEqual(['', ''], [status['err'] for status in statuses])
+        self.assertEqual([1, 2], [status['line'] for status in statuses])
+        self.assertEqual(self._assembled('examples/exe/year_of_birth.so'),
+                         (self.out / 'yob.rk').read_bytes())
+        self.assertEqual(self._assembled('examples/inline.so',
+                                         text='>"lib/pow.so"\nnl',
+                                         optimized=True),
+                         (self.out / 'inline/pow.rk').read_bytes())
+
+    def test_reports_each_failure_and_carries_on(self):
+        statuses = list(batch.run(self._manifest(
+            'not json',
+            {'text': 'nl'},
+            {'target': str(self.out / 'a.rk')},
+            {'text': 'nop 1', 'target': str(self.out / 'b.rk')},
+            {'text': 'nl', 'target': str(self.out / 'c.rk'),
+             'options': {'mem_format': 'xml'}},
+            {'text': 'nl', 'target': str(self.out / 'd.rk')},
+            {'source': 5, 'target': str(self.out / 'e.rk')},
+            {'source': 'e.so', 'text': ['nl'],
+             'target': str(self.out / 'e.rk')},
+        )))
+
+        self.assertEqual(
+            ['[manifest]', '[manifest]', '[manifest]', '[preprocessor]',
+             '[manifest]', '', '[manifest]', '[manifest]'],
+            [status['err'].split(' ')[0] for status in statuses])
+        self.assertEqual('[manifest] source is not a string',
+                         statuses[6]['err'])
+        self.assertEqual('[manifest] text is not a string',
+                         statuses[7]['err'])
+        self.assertTrue((self.out / 'd.rk').exists())
+
+    def test_writes_an_archive_instead_of_targets(self):
+        path = self.out / 'all.rka'
+        with Archive.Archive(path) as archive:
+            statuses = list(batch.run(self._manifest(
+                {'source': 'examples/lib/math.so', 'target': 'math.rk'},
+                {'text': 'nl', 'target': 'nl.rk'},
+                {'text': 'nl', 'target': 'nl.rk'},
+            ), archive))
+
+        self.assertEqual(['', '', '[archive]'],
+                         [status['err'][:9] for status in statuses])
+        buf = path.read_bytes()
+        index = Archive.index(buf)
+        offset, size = index['math.rk']
+        self.assertEqual((offset, size),
+                         (statuses[0]['offset'], statuses[0]['size']))
+        self.assertEqual(self._assembled('examples/lib/math.so'),
+                         buf[offset:offset + size])
+        self.assertFalse(Path('math.rk').exists())
+
+    def test_shares_include_files_between_entries(self):
+        include = self.out / 'lib.so'
+        include.write_text('nl')
+        entries = [{'source': str(self.out / 'main.so'),
+                    'text': '>"lib.so"', 'target': str(self.out / 'a.rk')},
+                   {'source': str(self.out / 'main.so'),
+                    'text': '>"lib.so"', 'target': str(self.out / 'b.rk')}]
+
+        statuses = batch.run(self._manifest(*entries))
+        self.assertEqual('', next(statuses)['err'])
+        include.write_text('out "changed"')
+        self.assertEqual('', next(statuses)['err'])
+        self.assertEqual((self.out / 'a.rk').read_bytes(),
+                         (self.out / 'b.rk').read_bytes())
+
+    """ Utility methods. """
+    @staticmethod
+    def _manifest(*entries):
+        return [entry if isinstance(entry, str) else json.dumps(entry)
+                for entry in entries]
+
+    @staticmethod
+    def _assembled(source, **options):
+        return build.assemble(source, None, **options).image
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import build
+from morty import make
+
+
+class BuildTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.out = Path(self.dir.name)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_assembles_source_to_target(self):
+        target = self.out / 'nop.rk'
+        report = build.assemble('examples/theory/nop.so', target)
+        self.assertEqual('', report.err)
+        self.assertTrue(target.read_bytes().startswith(make.WATERMARK))
+
+    def test_returns_error_instead_of_exiting(self):
+        self.assertIn('extension', build.assemble('README.md', 'out.rk').err)
+        self.assertIn('[loader]', build.assemble('missing.so', 'out.rk').err)
+
+    def test_pool_output_matches_sequential_output(self):
+        sources = sorted(Path('examples/theory').glob('*.so'))
+        sequential = [(src, self.out / f'{src.stem}.1.rk') for src in sources]
+        pooled = [(src, self.out / f'{src.stem}.2.rk') for src in sources]
+
+        for report in build.assemble_many(sequential):
+            self.assertEqual('', report.err)
+        reports = list(build.assemble_many(pooled, workers=2))
+
+        self.assertEqual([src for src, _ in pooled],
+                         [report.source for report in reports])
+        for (_, one), (_, two) in zip(sequential, pooled):
+            self.assertEqual(one.read_bytes(), two.read_bytes())
+
+    def test_reports_bytes_saved_by_tree_shaking(self):
+        plain, shaken = self.out / 'plain.rk', self.out / 'shaken.rk'
+        build.assemble('examples/exe/year_of_birth.so', plain)
+        report = build.assemble('examples/exe/year_of_birth.so', shaken,
+                                shake=True)
+        self.assertEqual(0, report.saved)
+        self.assertEqual(plain.read_bytes(), shaken.read_bytes())
+
+        build.assemble('examples/lib/math.so', plain)
+        report = build.assemble('examples/lib/math.so', shaken, shake=True)
+        self.assertGreater(report.saved, 0)
+        self.assertEqual(plain.stat().st_size - report.saved,
+                         shaken.stat().st_size)
+
+    def test_reports_errors_per_source(self):
+        pairs = [
+            ('examples/theory/nop.so', self.out / 'nop.rk'),
+            ('missing.so', self.out / 'missing.rk'),
+        ]
+        errors = [report.err
+                  for report in build.assemble_many(pairs, workers=2)]
+        self.assertEqual('', errors[0])
+        self.assertTrue(errors[1])
+
+    def test_timings_are_off_by_default(self):
+        report = build.assemble('examples/theory/while.so',
+                                self.out / 'while.rk')
+        self.assertIsNone(report.timings)
+
+    def test_timed_assembly_reports_stages_and_counts(self):
+        for stream, stages in ((False, ['load', 'preprocess']),
+                               (True, ['stream'])):
+            target = self.out / 'yob.rk'
+            report = build.assemble('examples/exe/year_of_birth.so', target,
+                                    stream=stream, timed=True)
+            timings = report.timings.as_dict()
+            self.assertEqual(stages + ['make', 'write'],
+                             list(timings['stages']))
+            self.assertEqual(22, timings['lines'])
+            self.assertEqual(2, timings['includes'])
+            self.assertEqual(13, timings['memory'])
+            self.assertEqual(len(target.read_bytes()), timings['bytes'])
+
+    def test_timed_assembly_reports_cache_hits(self):
+        for run in range(2):
+            report = build.assemble('examples/exe/year_of_birth.so',
+                                    self.out / 'yob.rk', timed=True,
+                                    cache_dir=self.out / 'cache')
+            timings = report.timings.as_dict()
+            self.assertEqual(2 * run, timings['file_hits'])
+            self.assertEqual(2 - 2 * run, timings['file_misses'])
+        self.assertEqual(0, timings['parse_misses'])
+
+        report = build.assemble('examples/exe/year_of_birth.so',
+                                self.out / 'yob.rk', timed=True)
+        timings = report.timings.as_dict()
+        self.assertGreater(timings['parse_hits'], 0)
+        self.assertNotIn('file_hits', timings)
+
+    def test_writes_dependency_file_next_to_target(self):
+        target = self.out / 'math.rk'
+        report = build.assemble('examples/lib/math.so', target, depfile=True)
+        self.assertEqual('', report.err)
+        self.assertEqual(
+            f'{target}: \\\n'
+            f' {Path("examples/lib/math.so").absolute()} \\\n'
+            f' {Path("examples/lib/factorial.so").absolute()} \\\n'
+            f' {Path("examples/lib/pow.so").absolute()}\n',
+            Path(f'{target}.d').read_text())
+
+        relative = Path(os.path.relpath(self.out / 'yob.rk'))
+        build.assemble('examples/exe/year_of_birth.so', relative,
+                       depfile=True)
+        self.assertEqual(
+            f'{relative}: \\\n'
+            ' examples/exe/year_of_birth.so \\\n'
+            ' examples/lib/factorial.so\n',
+            Path(f'{relative}.d').read_text())
+
+    def test_skips_dependency_file_on_error(self):
+        target = self.out / 'missing.rk'
+        build.assemble('missing.so', target, depfile=True)
+        self.assertFalse(Path(f'{target}.d').exists())
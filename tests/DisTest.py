@@ -0,0 +1,61 @@
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import dis
+from morty import make
+from morty.Op import Op
+
+
+class DisTest(TestCase):
+    def image(self, mem):
+        # 0: PUSH 0; JUMP  5: L: PUSH 1; OUT; END
+        return make.code(
+            mem=mem(6, 'hi'),
+            ins=make.ins(Op.PUSH, make.i32(0), Op.JUMP,
+                         Op.PUSH, make.i32(1), Op.OUT),
+        )
+
+    def test_instructions_decodes_operands(self):
+        image = self.image(make.mem)
+        memory, start = dis.read.code(image)
+        self.assertEqual(
+            [(0, Op.PUSH[0], 0), (5, Op.JUMP[0], None),
+             (6, Op.PUSH[0], 1), (11, Op.OUT[0], None),
+             (12, Op.END[0], None)],
+            [(offset - start, op, slot)
+             for offset, op, slot in dis.instructions(image, start)])
+
+    def test_instructions_rejects_truncated_operand(self):
+        with self.assertRaises(ValueError):
+            list(dis.instructions(Op.PUSH + b'\x00', 0))
+
+    def test_labels_follow_jumps(self):
+        image = self.image(make.mem)
+        memory, start = dis.read.code(image)
+        self.assertEqual({6: 0}, dis.labels(image, start, memory))
+
+    def test_listing(self):
+        for mem in (make.mem, make.mem_bin):
+            self.assertEqual([
+                '; memory: 2 slots',
+                ';        0  label L0',
+                ';        1  "hi"',
+                '; code: 13 bytes',
+                '  00000000  PUSH  0      ; L0',
+                '  00000005  JUMP',
+                'L0:',
+                '  00000006  PUSH  1      ; "hi"',
+                '  0000000b  OUT',
+                '  0000000c  END',
+            ], list(dis.listing(self.image(mem))))
+
+    def test_disassemble_maps_file(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp, 'out.rk')
+            path.write_bytes(self.image(make.mem))
+            out = StringIO()
+            dis.disassemble(path, out)
+        self.assertIn('L0:\n', out.getvalue())
+        self.assertTrue(out.getvalue().endswith('END\n'))
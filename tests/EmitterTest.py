@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from morty.Emitter import Emitter
+from morty.Op import Op
+from morty.make import i32
+
+
+class EmitterTest(TestCase):
+    def setUp(self) -> None:
+        self.emitter = Emitter()
+
+    def test_starts_empty(self):
+        self.assertEqual(0, len(self.emitter))
+        self.assertEqual(b'', self.emitter.getvalue())
+
+    def test_emit_appends_in_order(self):
+        self.emitter.emit(Op.PUSH, i32(1))
+        self.emitter.emit(Op.OUT)
+        self.assertEqual(Op.PUSH + i32(1) + Op.OUT, self.emitter.getvalue())
+
+    def test_offset_tracks_length(self):
+        self.emitter.emit(Op.PUSH, i32(0), Op.JUMP)
+        self.assertEqual(6, self.emitter.offset())
+        self.assertEqual(6, len(self.emitter))
+
+    def test_truncate_drops_the_tail(self):
+        self.emitter.emit(Op.NL, Op.PUSH, i32(0), Op.OUT)
+        self.emitter.truncate(1)
+        self.assertEqual(Op.NL, self.emitter.getvalue())
+
+    def test_compares_equal_to_bytes(self):
+        self.emitter.emit(Op.NL, Op.END)
+        self.assertEqual(Op.NL + Op.END, self.emitter)
+        self.assertEqual(Op.NL + Op.END, bytes(self.emitter))
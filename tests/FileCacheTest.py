@@ -0,0 +1,83 @@
+from pathlib import Path
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from morty import __version__
+from morty.FileCache import FileCache
+from morty.Loader import Loader
+from morty.ParseCache import ParseCache
+from morty.Parser import State
+from morty.Preprocessor import Preprocessor
+
+
+class FileCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.cache = FileCache(self.dir.name, parse_cache=ParseCache())
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_misses_unknown_content(self):
+        self.assertIsNone(self.cache.load(b'nl\n'))
+        self.assertEqual(1, self.cache.misses)
+
+    def test_round_trips_lines(self):
+        lines = ['>"lib.so"', 'main:', 'put 1 a']
+        self.cache.store(b'source', lines)
+        self.assertEqual(lines, self.cache.load(b'source'))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_parses_loaded_lines(self):
+        self.cache.store(b'source', ['main:', 'put "x" a'])
+        parse_cache = ParseCache()
+        cache = FileCache(self.dir.name, parse_cache=parse_cache)
+        cache.load(b'source')
+        self.assertEqual(
+            ('put', ((State.STRING, 'x'), (State.IDENTIFIER, 'a'))),
+            cache.parse('put "x" a'))
+        self.assertEqual(('jump', ((State.IDENTIFIER, 'main'),)),
+                         cache.parse('jump main'))
+        self.assertEqual(0, parse_cache.hits)
+        self.assertEqual(1, parse_cache.misses)
+
+    def test_warm_programs_larger_than_the_parse_cache_are_not_reparsed(self):
+        path = Path(self.dir.name) / 'big.so'
+        path.write_text('\n'.join(f'put {n} x{n}' for n in range(64)))
+        for _ in range(2):
+            parse_cache = ParseCache(maxsize=8)
+            cache = FileCache(self.dir.name, parse_cache=parse_cache)
+            loader = Loader(cache=cache)
+            loader.load(str(path))
+            pre = Preprocessor(cache=cache)
+            pre.feed(loader.code)
+            self.assertEqual('', pre.err)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0, parse_cache.misses)
+
+    def test_entries_are_versioned(self):
+        self.assertEqual(f'v{__version__}-{FileCache.format()}',
+                         self.cache.root.name)
+
+    def test_ignores_corrupt_entries(self):
+        self.cache.store(b'source', ['nl'])
+        self.cache._path(b'source').write_text('{')
+        self.assertIsNone(self.cache.load(b'source'))
+
+    def test_ignores_entries_with_corrupt_parses(self):
+        self.cache.store(b'source', ['nl'])
+        self.cache._path(b'source').write_text(
+            '{"lines": ["nl"], "parsed": [["nl"]]}')
+        self.assertIsNone(self.cache.load(b'source'))
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual({}, self.cache.parsed)
+
+    def test_loader_output_matches_uncached_loader(self):
+        src = 'examples/exe/year_of_birth.so'
+        reference = Loader()
+        reference.load(src)
+        for _ in range(2):
+            loader = Loader(cache=self.cache)
+            loader.load(src)
+            self.assertEqual(reference.code, loader.code)
+        self.assertEqual(2, self.cache.hits)
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from morty.fold import div, fold_instruction, mod
+from morty.Op import Op
+from morty.Parser import State
+from morty.Preprocessor import Preprocessor
+from morty import make
+from morty.make import i32
+
+
+class FoldTest(TestCase):
+    def test_division_truncates_towards_zero(self):
+        self.assertEqual([3, -3, -3, 3],
+                         [div(7, 2), div(-7, 2), div(7, -2), div(-7, -2)])
+
+    def test_remainder_takes_sign_of_dividend(self):
+        self.assertEqual([1, -1, 1, -1],
+                         [mod(7, 2), mod(-7, 2), mod(7, -2), mod(-7, -2)])
+
+    def test_folds_arithmetic(self):
+        self._assert_folds('add', 2, 3, 5)
+        self._assert_folds('sub', 2, 3, -1)
+        self._assert_folds('mul', -4, 3, -12)
+        self._assert_folds('div', -7, 2, -3)
+        self._assert_folds('mod', -7, 2, -1)
+
+    def test_folds_comparisons_to_integers(self):
+        self._assert_folds('gth', 2, 3, 0)
+        self._assert_folds('lth', 2, 3, 1)
+        self._assert_folds('geq', 3, 3, 1)
+        self._assert_folds('leq', 4, 3, 0)
+        self._assert_folds('eq', 3, 3, 1)
+        self._assert_folds('neq', 3, 3, 0)
+
+    def test_folds_logic(self):
+        self._assert_folds('and', 2, 0, 0)
+        self._assert_folds('or', 2, 0, 1)
+        self.assertEqual(
+            ('put', ((State.INTEGER, 0), (State.IDENTIFIER, 'x'))),
+            fold_instruction('not', ((State.INTEGER, 42),
+                                     (State.IDENTIFIER, 'x'))))
+
+    def test_folds_string_concatenation(self):
+        self.assertEqual(
+            ('put', ((State.STRING, 'ab'), (State.IDENTIFIER, 's'))),
+            fold_instruction('con', ((State.STRING, 'a'),
+                                     (State.STRING, 'b'),
+                                     (State.IDENTIFIER, 's'))))
+
+    def test_leaves_division_by_zero_alone(self):
+        self._assert_does_not_fold('div', ((State.INTEGER, 1),
+                                           (State.INTEGER, 0)))
+        self._assert_does_not_fold('mod', ((State.INTEGER, 1),
+                                           (State.INTEGER, 0)))
+
+    def test_leaves_i32_overflow_alone(self):
+        self._assert_does_not_fold('mul', ((State.INTEGER, 2 ** 16),
+                                           (State.INTEGER, 2 ** 16)))
+
+    def test_leaves_variables_alone(self):
+        self._assert_does_not_fold('add', ((State.IDENTIFIER, 'n'),
+                                           (State.INTEGER, 1)))
+        self._assert_does_not_fold('con', ((State.INTEGER, 1),
+                                           (State.STRING, 'a')))
+
+    def test_preprocessor_emits_put_of_folded_literal(self):
+        pre = Preprocessor(fold=True)
+        pre.process(['add 2 3 x', 'outl x'])
+        self.assertFalse(pre.err)
+        self.assertEqual([5, None], pre.memory)
+        self.assertEqual(
+            make.ins(Op.PUSH, i32(0), Op.POP, i32(1),
+                     Op.PUSH, i32(1), Op.OUT, Op.NL),
+            pre.instructions)
+
+    def test_preprocessor_checks_types_before_folding(self):
+        pre = Preprocessor(fold=True)
+        pre.process(['add "a" 1 x'])
+        self.assertTrue(pre.err)
+
+    """ Utility methods. """
+    def _assert_folds(self, opcode, x, y, result):
+        self.assertEqual(
+            ('put', ((State.INTEGER, result), (State.IDENTIFIER, 'z'))),
+            fold_instruction(opcode, ((State.INTEGER, x),
+                                      (State.INTEGER, y),
+                                      (State.IDENTIFIER, 'z'))))
+
+    def _assert_does_not_fold(self, opcode, operand):
+        operand += ((State.IDENTIFIER, 'z'),)
+        self.assertEqual((opcode, operand), fold_instruction(opcode, operand))
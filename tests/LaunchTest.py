@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import launch
+
+
+class LaunchTest(TestCase):
+    SOURCE = 'examples/exe/year_of_birth.so'
+
+    def test_recognises_simple_assembly(self):
+        self.assertEqual((self.SOURCE, 'out.rk', False),
+                         launch._simple_assemble([self.SOURCE]))
+        self.assertEqual((self.SOURCE, 'a.rk', False),
+                         launch._simple_assemble([self.SOURCE, '--target',
+                                                  'a.rk']))
+        self.assertEqual((self.SOURCE, 'a.rk', True),
+                         launch._simple_assemble(['--target=a.rk', '-MD',
+                                                  self.SOURCE]))
+
+    def test_leaves_everything_else_to_the_cli(self):
+        for argv in ([], ['--help'], ['dis', 'out.rk'], [self.SOURCE, '-O'],
+                     [self.SOURCE, self.SOURCE], [self.SOURCE, '--target'],
+                     ['examples/exe'], ['missing.so'], ['README.md']):
+            self.assertIsNone(launch._simple_assemble(argv), argv)
+
+    def test_simple_assembly_uses_the_cache_dir_from_the_environment(self):
+        with TemporaryDirectory() as tmp:
+            cache = Path(tmp, 'cache')
+            subprocess.run(
+                [sys.executable, '-m', 'morty.launch', self.SOURCE,
+                 '--target', str(Path(tmp, 'out.rk'))],
+                env=dict(os.environ, MORTY_CACHE_DIR=str(cache)), check=True)
+            self.assertTrue(any(path.is_file() for path in cache.rglob('*')))
+
+    def test_timings_flag_does_not_take_the_source(self):
+        with TemporaryDirectory() as tmp:
+            result = subprocess.run(
+                [sys.executable, '-m', 'morty.launch', '--timings',
+                 self.SOURCE, '--target', str(Path(tmp, 'out.rk'))],
+                capture_output=True, text=True)
+            self.assertEqual(0, result.returncode, result.stderr)
+            self.assertIn('timings for', result.stderr)
+
+            result = subprocess.run(
+                [sys.executable, '-m', 'morty.launch', '--timings-format',
+                 'json', self.SOURCE, '--target', str(Path(tmp, 'out.rk'))],
+                capture_output=True, text=True, check=True)
+            self.assertIn('"stages"', result.stderr)
+
+    def test_simple_assembly_skips_click_and_colours(self):
+        with TemporaryDirectory() as tmp:
+            target = Path(tmp, 'out.rk')
+            script = (
+                'import sys\n'
+                'from morty import launch\n'
+                f'launch.main([{self.SOURCE!r},'
+                f' "--target", {str(target)!r}])\n'
+                'print(sorted({"click", "colorama", "termcolor"}'
+                ' & set(sys.modules)))\n'
+            )
+            run = subprocess.run([sys.executable, '-c', script],
+                                 capture_output=True, text=True, check=True)
+            self.assertEqual('[]', run.stdout.strip())
+            self.assertTrue(target.exists())
@@ -0,0 +1,109 @@
+from pathlib import Path
+from unittest import TestCase
+
+from morty.Lexer import Lexer, lex
+from morty.Loader import Loader
+from morty.Parser import Parser, State
+from morty.Preprocessor import Preprocessor
+
+
+class LexerTest(TestCase):
+    def test_can_parse_instruction_with_no_operand(self):
+        self._parse_and_check_result('end', 'end', ())
+
+    def test_can_parse_instruction_with_negative_int(self):
+        self._parse_and_check_result(
+            'put -2020 year',
+            'put', ((State.INTEGER, -2020), (State.IDENTIFIER, 'year'))
+        )
+
+    def test_can_parse_instruction_with_escapes_in_str(self):
+        self._parse_and_check_result(
+            r'put "He said:\t\"I love SmallO\"\n" s',
+            'put', ((State.STRING, 'He said:\t"I love SmallO"\n'),
+                    (State.IDENTIFIER, 's'))
+        )
+
+    def test_can_parse_complex_instruction(self):
+        self._parse_and_check_result(
+            'add "one" 2 var',
+            'add', (
+                (State.STRING, 'one'),
+                (State.INTEGER, 2),
+                (State.IDENTIFIER, 'var')
+            )
+        )
+
+    def test_matches_parser_on_valid_instructions(self):
+        for line in [
+            'nl',
+            'jump  start',
+            'put 007 x',
+            'put "" _empty',
+            'con "a;b" "c" s',
+            'out "a"b',
+            r'out "back\\"slash"',
+            'jump a;ignored',
+            'nl;',
+            'put -0 zero',
+        ]:
+            self._assert_matches_parser(line)
+
+    def test_matches_parser_on_invalid_instructions(self):
+        for line in ['Put 1 a', 'put 1a b', 'put a-b c', 'ju2mp a',
+                     'put 1 a"', 'put #']:
+            self.assertIsNone(lex(line), line)
+            self._assert_matches_parser(line)
+
+    def test_reports_errors_the_parser_crashes_on(self):
+        self.assertIsNone(lex('put "unterminated'))
+        self.assertIsNone(lex(r'put "abc\" x'))
+        self.assertIsNone(lex(r'out "abc\"'))
+        self.assertIsNone(lex('put - a'))
+
+    def test_matches_parser_on_examples(self):
+        for path in Path('examples').rglob('*.so'):
+            loader = Loader()
+            loader.load(path)
+            for line in loader.code:
+                if not Preprocessor._is_label(line):
+                    self._assert_matches_parser(line)
+
+    def test_preprocessor_output_matches_parser(self):
+        code = [
+            'jump main',
+            'func:',
+            'out "Input your age: "',
+            'ini age',
+            'con "You are " age msg',
+            'outl msg',
+            'back',
+            'main:',
+            'br func',
+        ]
+        reference = Preprocessor(parser=Parser)
+        reference.process(list(code))
+        pre = Preprocessor(parser=Lexer)
+        pre.process(list(code))
+        self.assertEqual(reference.memory, pre.memory)
+        self.assertEqual(reference.instructions, pre.instructions)
+
+    """ Utility methods. """
+    def _parse_and_check_result(self, instruction, opcode, operand):
+        lexer = Lexer()
+        lexer.parse(instruction)
+        self.assertFalse(lexer.err())
+        self.assertEqual(opcode, lexer.opcode)
+        self.assertEqual(operand, lexer.operand)
+
+    def _assert_matches_parser(self, line):
+        parser = Parser()
+        parser.parse(line)
+        lexer = Lexer()
+        lexer.parse(line)
+        self.assertEqual(parser.err(), lexer.err(), line)
+        if not parser.err():
+            self.assertEqual(
+                (parser.opcode, parser.operand),
+                (lexer.opcode, lexer.operand),
+                line)
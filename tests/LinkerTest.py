@@ -0,0 +1,91 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import build
+from morty.Linker import Linker
+from morty.ObjectFile import ObjectFile
+from morty.Preprocessor import Preprocessor
+
+
+class LinkerTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.out = Path(self.dir.name)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_linked_objects_match_assembled_source(self):
+        for optimized in (False, True):
+            for entry, libraries in (
+                    ('exe/year_of_birth', ['lib/factorial']),
+                    ('lib/math', ['lib/pow', 'lib/factorial'])):
+                objects = [self._compile(f'examples/{name}.so', optimized)
+                           for name in [entry, *libraries]]
+
+                linked, assembled = self.out / 'l.rk', self.out / 'a.rk'
+                self.assertEqual('', build.link(
+                    objects, linked, optimized=optimized).err)
+                build.assemble(f'examples/{entry}.so', assembled,
+                               optimized=optimized)
+                self.assertEqual(assembled.read_bytes(), linked.read_bytes())
+
+    def test_places_includes_once_and_the_rest_after_the_entry(self):
+        self._write('main.so', 'jump main\n>"lib.so"\nmain:\nout x\n>"lib.so"')
+        self._write('lib.so', 'put 1 x\nback')
+        self._write('extra.so', 'extra:\nput 2 x')
+        objects = [self._load(name) for name in ('main', 'lib', 'extra')]
+
+        linker = Linker()
+        linker.link(objects)
+        self.assertEqual('', linker.err)
+        self.assertEqual({'main', 'extra'}, linker.labels)
+        self.assertEqual(self._assembled('jump main\nput 1 x\nback\nmain:\n'
+                                         'out x\nextra:\nput 2 x'),
+                         linker.instructions.getvalue())
+
+    def test_reports_unresolved_includes(self):
+        self._write('main.so', '>"lib.so"\nnl')
+        linker = Linker()
+        linker.link([self._load('main')])
+        self.assertIn('unresolved include', linker.err)
+
+    def test_reports_duplicate_labels(self):
+        self._write('one.so', 'here:\nnl')
+        self._write('two.so', 'here:\nnl')
+        linker = Linker()
+        linker.link([self._load('one'), self._load('two')])
+        self.assertIn('duplicate labels', linker.err)
+
+    def test_reports_objects_linked_twice(self):
+        self._write('one.so', 'nl')
+        self.assertIn('linked twice',
+                      build.link([self._compile(self.out / 'one.so')] * 2,
+                                 self.out / 'out.rk').err)
+
+    def test_reports_files_that_are_not_objects(self):
+        self._write('one.so', 'nl')
+        self.assertIn('[link]', build.link([self.out / 'one.so'],
+                                           self.out / 'out.rk').err)
+
+    """ Utility methods. """
+    def _write(self, name, text):
+        (self.out / name).write_text(text)
+
+    def _compile(self, source, optimized=False):
+        target = self.out / f'{Path(source).stem}.o'
+        report = build.assemble(source, target, relocatable=True,
+                                optimized=optimized)
+        self.assertEqual('', report.err)
+        return target
+
+    def _load(self, name):
+        target = self._compile(self.out / f'{name}.so')
+        return ObjectFile.decode(target.read_bytes())
+
+    @staticmethod
+    def _assembled(text):
+        pre = Preprocessor()
+        pre.process(text.splitlines())
+        return pre.instructions.getvalue()
@@ -87,6 +87,54 @@ class LoaderTest(TestCase):
         os.remove('one.so')
         os.remove('two.so')
 
+    def test_concurrent_loading_matches_sequential_loading(self):
+        self._write_to_file('one.so', '>"two.so"\nini a\n>"test.so"')
+        self._write_to_file('two.so', '>"one.so"\nini b')
+        self._write_to_test_file(
+            '>"one.so"\n>"examples/lib/math.so"\n>"two.so"\nini c')
+        self._load()
+        concurrent = Loader(workers=4)
+        concurrent.load('test.so')
+        self.assertEqual(self.loader.code, concurrent.code)
+        self.assertEqual(self.loader.included, concurrent.included)
+        os.remove('one.so')
+        os.remove('two.so')
+
+    def test_concurrent_loading_reports_missing_includes(self):
+        self._write_to_test_file('>"examples/lib/math.so"\n>"missing.so"')
+        self.loader = Loader(workers=4)
+        self._load()
+        self._assert_err_flag_set()
+
+    def test_stream_yields_loaded_code(self):
+        self._write_to_test_file(
+            '>"examples/lib/math.so"\nini a @ comment\n>"examples/lib/pow.so"')
+        self._load()
+        self.assertEqual(self.loader.code, list(Loader().stream('test.so')))
+
+    def test_stream_reads_includes_lazily(self):
+        self._write_to_test_file('ini a\n>"examples/lib/pow.so"')
+        stream = self.loader.stream('test.so')
+        self.assertEqual('ini a', next(stream))
+        self.assertEqual(1, len(self.loader.included))
+        self.assertEqual('sqr:', next(stream))
+        self.assertEqual(2, len(self.loader.included))
+
+    def test_stream_stops_on_error(self):
+        self._write_to_test_file('ini a\n>"missing.so"\nini b')
+        self.assertEqual(['ini a'], list(self.loader.stream('test.so')))
+        self._assert_err_flag_set()
+
+    def test_sections_split_at_includes_without_loading_them(self):
+        self._write_to_test_file(
+            'ini a\n>"examples/lib/pow.so"\n>"missing.so"\nout a')
+        sections, includes = self.loader.sections('test.so')
+        self.assertEqual([['ini a'], [], ['out a']], sections)
+        self.assertEqual(['pow.so', 'missing.so'],
+                         [path.name for path in includes])
+        self.assertEqual(1, len(self.loader.included))
+        self.assertFalse(self.loader.err)
+
     """ Destructive tests. """
     def test_sets_err_flag_on_nonexistent_include(self):
         self._write_to_test_file('>"non-existent.so"')
@@ -103,6 +151,10 @@ class LoaderTest(TestCase):
         self._load()
         self._assert_err_flag_set()
 
+        self.loader = Loader()
+        self.loader.sections('test.so')
+        self._assert_err_flag_set()
+
     def test_ignores_known_includes(self):
         self._write_to_test_file('>"one.so"\nout "hello world"')
         self._write_to_file('one.so', '>"test.so"\n out "bye world"')
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from morty import make
+from morty.Machine import Machine, wrap
+from morty.Preprocessor import Preprocessor
+
+
+def image(*lines):
+    pre = Preprocessor()
+    pre.process(list(lines))
+    assert not pre.err, pre.err
+    return make.code(mem=make.mem(*pre.memory),
+                     ins=pre.instructions.getvalue())
+
+
+class MachineTest(TestCase):
+    def run_lines(self, *lines, stdin=()):
+        machine = Machine(image(*lines), stdin=stdin)
+        machine.run(max_steps=10_000)
+        return machine
+
+    def test_arithmetic(self):
+        machine = self.run_lines(
+            'add 2 3 x', 'mul x 4 x', 'sub x 1 x', 'div x -3 y', 'mod x -3 z',
+            'outl x', 'outl y', 'outl z')
+        self.assertEqual(0, machine.status)
+        self.assertEqual('19\n-6\n1\n', ''.join(machine.output))
+
+    def test_integers_wrap(self):
+        self.assertEqual(-2 ** 31, wrap(2 ** 31))
+        machine = self.run_lines('add 2147483647 1 x', 'out x')
+        self.assertEqual('-2147483648', ''.join(machine.output))
+
+    def test_logic_and_strings(self):
+        machine = self.run_lines(
+            'and 1 0 a', 'or 1 0 o', 'not 0 n', 'eq 2 2 e', 'geq 1 2 g',
+            'con "n=" n s', 'sti "42" i',
+            'out a', 'out o', 'out n', 'out e', 'out g', 'out s', 'out i')
+        self.assertEqual('01110n=142', ''.join(machine.output))
+
+    def test_input(self):
+        machine = self.run_lines('ini n', 'ins s', 'out s', 'out n',
+                                 stdin=['7\n', 'seven\n'])
+        self.assertEqual('seven7', ''.join(machine.output))
+
+    def test_input_exhausted(self):
+        machine = self.run_lines('ini n')
+        self.assertEqual(1, machine.status)
+        self.assertEqual('input exhausted', machine.err)
+
+    def test_branch_and_back(self):
+        machine = self.run_lines(
+            'put 3 n', 'br twice', 'outl n', 'jump done',
+            'twice:', 'mul n 2 n', 'back',
+            'done:')
+        self.assertEqual('6\n', ''.join(machine.output))
+        self.assertEqual(0, machine.status)
+
+    def test_conditional_jumps(self):
+        machine = self.run_lines(
+            'put 3 n',
+            'loop:', 'out n', 'sub n 1 n', 'gth n 0 b', 'jmpt b loop',
+            'jmpf b skip', 'out "unreachable"', 'skip:',
+            'brf b routine', 'end',
+            'routine:', 'out "!"', 'back')
+        self.assertEqual('321!', ''.join(machine.output))
+
+    def test_err_sets_status(self):
+        machine = self.run_lines('err "boom" 3')
+        self.assertEqual(3, machine.status)
+        self.assertEqual('boom', ''.join(machine.output))
+
+    def test_division_by_zero(self):
+        machine = self.run_lines('div 1 0 x')
+        self.assertEqual(1, machine.status)
+        self.assertEqual('division by zero', machine.err)
+
+    def test_step_limit(self):
+        machine = self.run_lines('loop:', 'jump loop')
+        self.assertEqual(1, machine.status)
+        self.assertIn('step limit', machine.err)
+
+    def test_counts(self):
+        machine = self.run_lines('put 1 x', 'out x', 'out x')
+        self.assertEqual({'PUSH': 3, 'POP': 1, 'OUT': 2, 'END': 1},
+                         machine.counts)
+        self.assertEqual(7, machine.steps())
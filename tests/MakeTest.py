@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from morty import make
+from morty import read
+from morty.Op import Op
+
+
+class MakeTest(TestCase):
+    SPACE = (None, 0, -1, 2 ** 31 - 1, -2 ** 31, '', 'héllo\n', 'a' * 300)
+
+    def test_binary_memory_round_trips(self):
+        data = make.mem_bin(*self.SPACE)
+        self.assertEqual((list(self.SPACE), len(data)), read.mem_bin(data, 0))
+
+    def test_binary_memory_layout(self):
+        self.assertEqual(
+            b'RkM\x01' + b'\x00\x00\x00\x03' +
+            b'\x00' +
+            b'\x01\xff\xff\xff\xfe' +
+            b'\x02\x00\x00\x00\x02hi',
+            make.mem_bin(None, -2, 'hi'))
+
+    def test_binary_memory_rejects_values_outside_i32(self):
+        with self.assertRaises(ValueError):
+            make.mem_bin(2 ** 31)
+
+    def test_json_memory_round_trips(self):
+        data = make.mem(*self.SPACE)
+        self.assertEqual((list(self.SPACE), len(data)), read.mem(data, 0))
+
+    def test_code_detects_memory_format(self):
+        for mem in (make.mem, make.mem_bin):
+            image = make.code(mem(1, 'a'), make.ins(Op.NL))
+            memory, offset = read.code(image)
+            self.assertEqual([1, 'a'], memory)
+            self.assertEqual(Op.NL + Op.END, image[offset:])
+
+    def test_code_checks_watermark(self):
+        with self.assertRaises(ValueError):
+            read.code(b'Morty\0[]\0')
+
+    def test_rejects_unknown_binary_version(self):
+        data = bytearray(make.mem_bin(1))
+        data[3] = 2
+        with self.assertRaises(ValueError):
+            read.mem_bin(bytes(data), 0)
+
+    def test_escapes_dependencies_for_make(self):
+        self.assertEqual(b'a\\ b.rk: \\\n $$x.so \\\n \\#1.so\n',
+                         make.deps('a b.rk', ['$x.so', '#1.so']))
+
+    def test_rejects_truncated_binary_memory(self):
+        data = make.mem_bin(None, 7, 'héllo')
+        for size in range(len(data)):
+            with self.assertRaisesRegex(ValueError, 'truncated'):
+                read.mem_bin(data[:size], 0)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from morty.ObjectFile import ObjectFile, Section, relocations
+from morty.Op import Op
+from morty.Preprocessor import Preprocessor
+from morty.make import SEP
+
+
+class ObjectFileTest(TestCase):
+    def test_section_records_preprocessed_code(self):
+        pre = Preprocessor()
+        pre.feed(['out "x"', 'loop:', 'put 5 x', 'jump loop'])
+        section = Section.from_preprocessor(pre)
+
+        self.assertEqual(['x', 'loop', 5], section.symbols)
+        self.assertEqual(['x', 6, 5], section.memory)
+        self.assertEqual({'loop': 6}, section.labels)
+        self.assertEqual([1, 7, 12, 17], section.relocations)
+
+    def test_round_trips_through_bytes(self):
+        pre = Preprocessor()
+        pre.feed(['here:', 'out "n"', 'ini n', 'jmpt n here'])
+        obj = ObjectFile('/src/main.so',
+                         [Section.from_preprocessor(pre),
+                          Section([], [], {}, b'', [])],
+                         ['/src/lib.so'])
+
+        decoded = ObjectFile.decode(obj.encode())
+        self.assertEqual(obj.source, decoded.source)
+        self.assertEqual(obj.includes, decoded.includes)
+        for one, two in zip(obj.sections, decoded.sections):
+            self.assertEqual(vars(one), {**vars(two), 'relocations':
+                                         list(two.relocations)})
+
+    def test_finds_slot_operands(self):
+        code = Op.NL + Op.PUSH + bytes(4) + Op.OUT + Op.POP + bytes([1] * 4)
+        self.assertEqual([2, 8], relocations(code))
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            ObjectFile.decode(b'Rick\0[]\0')
+        with self.assertRaises(ValueError):
+            ObjectFile.decode(ObjectFile('a.so', [Section(
+                [], [], {}, b'\x01' * 5, [1])], []).encode()[:-2])
+
+    def test_rejects_malformed_headers(self):
+        for header in (b'[]', b'{}',
+                       b'{"source": "a.so", "includes": [], "sections": [{}]}',
+                       b'{"source": "a.so", "includes": [], "sections": '
+                       b'[{"symbols": [], "memory": [], "labels": {}, '
+                       b'"code": "1", "relocations": 0}]}'):
+            with self.assertRaisesRegex(ValueError, 'malformed'):
+                ObjectFile.decode(b'RkO\x01' + header + SEP)
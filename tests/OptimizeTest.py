@@ -0,0 +1,211 @@
+from unittest import TestCase
+
+from morty.Op import Op
+from morty.Preprocessor import Preprocessor
+from morty.Program import Program
+from morty import optimize
+from morty.make import i32
+
+
+class OptimizeTest(TestCase):
+    def test_removes_self_moves(self):
+        memory, ins = self._optimize(['ini a', 'put a a', 'outl a',
+                                      'outl a'])
+        self.assertEqual(
+            Op.INI + Op.POP + i32(0) +
+            (Op.PUSH + i32(0) + Op.OUT + Op.NL) * 2 + Op.END,
+            ins)
+
+    def test_forwards_dead_temporaries_on_the_stack(self):
+        memory, ins = self._optimize(['ini a', 'put a b', 'put b c',
+                                      'outl c'])
+        self.assertEqual(Op.INI + Op.OUT + Op.NL + Op.END, ins)
+
+    def test_keeps_temporaries_read_later(self):
+        memory, ins = self._optimize(['ini a', 'put a b', 'put b c',
+                                      'outl b'])
+        self.assertIn(Op.POP + i32(1) + Op.PUSH + i32(1), ins)
+
+    def test_keeps_temporaries_read_around_loops(self):
+        memory, ins = self._optimize(['loop:', 'outl b', 'ini a', 'put a b',
+                                      'put b c', 'jump loop'])
+        self.assertEqual(
+            Op.PUSH + i32(1) + Op.OUT + Op.NL + Op.INI +
+            Op.POP + i32(1) + Op.PUSH + i32(1) + Op.POP + i32(3) +
+            Op.PUSH + i32(0) + Op.JUMP,
+            ins)
+
+    def test_removes_jumps_to_next_instruction(self):
+        memory, ins = self._optimize(['jump next', 'next:', 'nl'])
+        self.assertEqual(Op.NL + Op.END, ins)
+        self.assertEqual([0], memory)
+
+    def test_threads_jumps_through_jump_labels(self):
+        memory, ins = self._optimize([
+            'jmpt b one',
+            'nl',
+            'one:',
+            'jump two',
+            'two:',
+            'outl "done"',
+        ])
+        self.assertEqual(
+            Op.PUSH + i32(2) + Op.PUSH + i32(0) + Op.JMPT +
+            Op.NL +
+            Op.PUSH + i32(3) + Op.OUT + Op.NL + Op.END,
+            ins)
+        self.assertEqual(12, memory[1])
+        self.assertEqual(12, memory[2])
+
+    def test_does_not_thread_through_reassigned_labels(self):
+        memory, ins = self._optimize([
+            'jmpt b one',
+            'put two one',
+            'one:',
+            'jump two',
+            'two:',
+        ])
+        self.assertIn(Op.PUSH + i32(1) + Op.PUSH + i32(0) + Op.JMPT, ins)
+
+    def test_removes_dead_code_until_next_label(self):
+        memory, ins = self._optimize([
+            'end',
+            'outl "never"',
+            'nl',
+            'exit:',
+            'nl',
+        ])
+        self.assertEqual(Op.END + Op.NL + Op.END, ins)
+        self.assertEqual(1, memory[1])
+
+    def test_keeps_code_after_jump_when_labelled(self):
+        code = ['jump exit', 'loop:', 'nl', 'jump loop', 'exit:']
+        _, ins = self._optimize(code)
+        self.assertEqual(self._preprocess(code).instructions.getvalue(), ins)
+
+    def test_leaves_programs_with_computed_jumps_alone(self):
+        code = ['put 50 mp', 'jump mp', 'nl']
+        _, ins = self._optimize(code)
+        self.assertEqual(self._preprocess(code).instructions.getvalue(), ins)
+
+    def test_shake_drops_unreachable_routines_and_their_memory(self):
+        program = self._program([
+            'jump main',
+            'unused:',
+            'outl "never"',
+            'back',
+            'used:',
+            'outl "hello"',
+            'back',
+            'main:',
+            'br used',
+        ])
+        self.assertEqual(4, optimize.shake(program))
+        memory, ins = program.assemble()
+        self.assertEqual([14, 6, 'hello'], memory)
+        self.assertEqual(
+            Op.PUSH + i32(0) + Op.JUMP +
+            Op.PUSH + i32(2) + Op.OUT + Op.NL + Op.BACK +
+            Op.PUSH + i32(1) + Op.BR + Op.END,
+            ins)
+
+    def test_shake_keeps_labels_whose_address_is_taken(self):
+        code = ['put routine r', 'end', 'routine:', 'nl']
+        program = self._program(code)
+        self.assertEqual(0, optimize.shake(program))
+
+    def test_shake_keeps_fall_through_and_conditional_paths(self):
+        code = ['jmpt b skip', 'nl', 'skip:', 'br f', 'end', 'f:', 'back']
+        program = self._program(code)
+        self.assertEqual(1, optimize.shake(program))
+        self.assertEqual(Op.BACK, program.code[-1][0])
+
+    def test_shake_leaves_programs_with_computed_jumps_alone(self):
+        program = self._program(['put 50 mp', 'jump mp', 'f:', 'nl'])
+        self.assertEqual(0, optimize.shake(program))
+
+    def test_shares_slots_between_disjoint_variables(self):
+        program = self._program([
+            'ini a',
+            'outl a',
+            'ini b',
+            'outl b',
+        ])
+        self.assertEqual(1, optimize.share_slots(program))
+        memory, ins = program.assemble()
+        self.assertEqual([None], memory)
+        self.assertEqual(
+            (Op.INI + Op.POP + i32(0) + Op.PUSH + i32(0) + Op.OUT + Op.NL) * 2
+            + Op.END,
+            ins)
+
+    def test_keeps_overlapping_variables_apart(self):
+        program = self._program([
+            'ini a',
+            'ini b',
+            'outl a',
+            'outl b',
+        ])
+        self.assertEqual(0, optimize.share_slots(program))
+
+    def test_keeps_variables_live_around_loops_apart(self):
+        program = self._program([
+            'ini n',
+            'loop:',
+            'ini t',
+            'outl t',
+            'sub n 1 n',
+            'jmpt n loop',
+        ])
+        optimize.share_slots(program)
+        slots = [slot for op, slot in program.code if op == Op.POP]
+        self.assertNotEqual(slots[0], slots[1])
+
+    def test_keeps_variables_read_before_assignment_apart(self):
+        program = self._program(['outl a', 'ini b', 'outl b'])
+        self.assertEqual(0, optimize.share_slots(program))
+
+    def test_shares_slots_across_subroutine_calls(self):
+        program = self._program([
+            'ini x',
+            'outl x',
+            'br f',
+            'end',
+            'f:',
+            'ini y',
+            'outl y',
+            'back',
+        ])
+        self.assertEqual(1, optimize.share_slots(program))
+
+    def test_keeps_variables_live_across_calls_apart(self):
+        program = self._program([
+            'ini x',
+            'br f',
+            'outl x',
+            'end',
+            'f:',
+            'ini y',
+            'outl y',
+            'back',
+        ])
+        self.assertEqual(0, optimize.share_slots(program))
+
+    """ Utility methods. """
+    @staticmethod
+    def _preprocess(code):
+        pre = Preprocessor()
+        pre.process(code)
+        return pre
+
+    def _program(self, code):
+        pre = self._preprocess(code)
+        self.assertFalse(pre.err)
+        return Program.from_preprocessor(pre)
+
+    def _optimize(self, code):
+        pre = self._preprocess(code)
+        self.assertFalse(pre.err)
+        program = Program.from_preprocessor(pre)
+        optimize.peephole(program)
+        return program.assemble()
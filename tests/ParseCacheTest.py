@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from morty.ParseCache import ParseCache
+from morty.Parser import Parser, State
+from morty.Preprocessor import Preprocessor
+
+
+class ParseCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.cache = ParseCache(maxsize=2)
+
+    def test_parses_instruction(self):
+        self.assertEqual(
+            ('jump', ((State.IDENTIFIER, 'main'),)),
+            self.cache.parse('jump main'))
+
+    def test_caches_parse_errors(self):
+        self.assertIsNone(self.cache.parse('Jump main'))
+        self.assertIsNone(self.cache.parse('Jump main'))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_counts_hits_and_misses(self):
+        self.cache.parse('back')
+        self.cache.parse('back')
+        self.cache.parse('nl')
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.parse('back')
+        self.cache.parse('nl')
+        self.cache.parse('back')
+        self.cache.parse('end')
+        self.assertEqual(2, len(self.cache))
+        self.cache.parse('back')
+        self.cache.parse('nl')
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(4, self.cache.misses)
+
+    def test_uses_given_parser(self):
+        cache = ParseCache(parser=Parser)
+        self.assertEqual(('nl', ()), cache.parse('nl'))
+
+    def test_shared_cache_is_reused_across_preprocessors(self):
+        cache = ParseCache()
+        Preprocessor(cache=cache).process(['back', 'jump main', 'main:'])
+        Preprocessor(cache=cache).process(['back', 'jump main', 'main:'])
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(3, cache.hits)
+
+    def test_shared_returns_one_cache_per_parser(self):
+        self.assertIs(ParseCache.shared(), ParseCache.shared())
+        self.assertIsNot(ParseCache.shared(), ParseCache.shared(Parser))
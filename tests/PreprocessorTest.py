@@ -32,6 +32,44 @@ class PreprocessorTest(TestCase):
             ins=make.ins(Op.PUSH, i32(0), Op.JUMP)
         )
 
+    def test_consumes_lines_from_a_generator(self):
+        self._assert_results_match(
+            inp=(line for line in ['ini n', 'out n']),
+            mem=[None],
+            ins=make.ins(Op.INI, Op.POP, i32(0),
+                 Op.PUSH, i32(0), Op.OUT)
+        )
+
+    def test_leaves_input_code_untouched(self):
+        code = ['nl']
+        self.pre.process(code)
+        self.assertEqual(['nl'], code)
+
+    def test_rollback_forgets_lines_fed_since_mark(self):
+        head = ['jump exit', 'put 1 a', 'loop:']
+        tail = ['put "x" b', 'exit:', 'jmpt a loop']
+
+        reference = Preprocessor()
+        reference.process(head + ['put 2 a'])
+
+        self.pre.feed(head)
+        mark = self.pre.mark()
+        self.pre.feed(tail)
+        self.pre.rollback(mark)
+        self.pre.process(['put 2 a'])
+
+        self.assertEqual(reference.memory, self.pre.memory)
+        self.assertEqual(reference.literals, self.pre.literals)
+        self.assertEqual(reference.labels, self.pre.labels)
+        self.assertEqual(reference.instructions, self.pre.instructions)
+
+    def test_rollback_clears_err(self):
+        self.pre.feed(['put 1 a'])
+        mark = self.pre.mark()
+        self.pre.feed(['bogus'])
+        self.pre.rollback(mark)
+        self.assertEqual('', self.pre.err)
+
     """ Destructive tests. """
     def test_sets_err_flag_on_duplicate_labels(self):
         self.pre.process(['start:', 'end', 'start:', 'add 1 2 s', 'back'])
@@ -0,0 +1,37 @@
+import cProfile
+from pathlib import Path
+import pstats
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import profiling
+
+
+def leaf(n):
+    return sum(range(n))
+
+
+def branch():
+    return leaf(20_000) + leaf(40_000)
+
+
+class ProfilingTest(TestCase):
+    def test_collapsed_stacks_add_up_to_total_time(self):
+        profile = cProfile.Profile()
+        profile.runcall(branch)
+        stats = pstats.Stats(profile)
+
+        lines = list(profiling.collapsed(stats))
+        total = sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+        self.assertAlmostEqual(stats.total_tt * 1e6, total,
+                               delta=len(lines) + 1)
+        self.assertTrue(any(line.startswith('branch (') and ';leaf (' in line
+                            for line in lines))
+
+    def test_profiled_writes_pstats_and_collapsed_stacks(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp, 'run.prof')
+            with profiling.profiled(path):
+                branch()
+            self.assertIn('branch', str(pstats.Stats(str(path)).stats))
+            self.assertIn('leaf', Path(f'{path}.collapsed').read_text())
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from morty.Op import Op
+from morty.Preprocessor import Preprocessor
+from morty.Program import Program, decode, encode
+from morty.make import i32
+
+
+class ProgramTest(TestCase):
+    def test_decode_splits_operands(self):
+        self.assertEqual(
+            [[Op.PUSH, 1], [Op.OUT, None], [Op.POP, 258]],
+            decode(Op.PUSH + i32(1) + Op.OUT + Op.POP + i32(258)))
+
+    def test_encode_reverses_decode(self):
+        ins = Op.INI + Op.POP + i32(0) + Op.PUSH + i32(0) + Op.OUT
+        self.assertEqual(ins, encode(decode(ins)))
+
+    def test_labels_are_instruction_indices_while_editing(self):
+        program = self._program(['jump exit', 'nl', 'exit:'])
+        self.assertEqual(3, program.memory[0])
+
+    def test_assemble_round_trips(self):
+        pre = self._preprocess(['jump exit', 'nl', 'exit:', 'outl "bye"'])
+        memory, ins = Program.from_preprocessor(pre).assemble()
+        self.assertEqual(pre.memory, memory)
+        self.assertEqual(pre.instructions.getvalue(), ins)
+
+    def test_remove_moves_labels_to_next_kept_instruction(self):
+        program = self._program(['jump exit', 'nl', 'exit:', 'nl'])
+        program.remove({2})
+        memory, ins = program.assemble()
+        self.assertEqual([6], memory)
+        self.assertEqual(Op.PUSH + i32(0) + Op.JUMP + Op.NL + Op.END, ins)
+
+    """ Utility methods. """
+    @staticmethod
+    def _preprocess(code):
+        pre = Preprocessor()
+        pre.process(code)
+        return pre
+
+    def _program(self, code):
+        return Program.from_preprocessor(self._preprocess(code))
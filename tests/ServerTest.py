@@ -0,0 +1,95 @@
+from contextlib import redirect_stderr
+import io
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import threading
+from unittest import TestCase
+
+from morty import build
+from morty import client
+from morty.Server import Server
+
+
+class ServerTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.root = Path(self.dir.name)
+        self.socket = str(self.root / 'morty.sock')
+        self.server = Server(self.socket)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.05,))
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def send(self, payload):
+        return client.request(payload, self.socket, timeout=10)
+
+    def test_ping(self):
+        self.assertEqual('', self.send({'op': 'ping'})['err'])
+
+    def test_assembles_like_build(self):
+        target = self.root / 'yob.rk'
+        response = self.send(client.assemble_request(
+            'examples/exe/year_of_birth.so', target, optimized=True))
+        self.assertEqual('', response['err'])
+
+        build.assemble('examples/exe/year_of_birth.so', self.root / 'ref.rk',
+                       optimized=True)
+        self.assertEqual((self.root / 'ref.rk').read_bytes(),
+                         target.read_bytes())
+
+    def test_inline_source_resolves_includes_next_to_it(self):
+        response = self.send(client.assemble_request(
+            'examples/exe/inline.so', self.root / 'inline.rk',
+            text='  br factorial\n>"../lib/factorial.so"\n'))
+        self.assertEqual('', response['err'])
+
+    def test_reports_errors(self):
+        response = self.send(client.assemble_request(
+            self.root / 'missing.so', self.root / 'out.rk'))
+        self.assertIn('[loader]', response['err'])
+        self.assertIn('unknown op', self.send({'op': 'nope'})['err'])
+        self.assertIn('bad request', self.send({'op': 'assemble'})['err'])
+
+    def test_reports_write_errors(self):
+        response = self.send(client.assemble_request(
+            'examples/exe/year_of_birth.so', self.root / 'nodir' / 'y.rk'))
+        self.assertIn('[write]', response['err'])
+
+    def test_client_reports_server_errors_without_retrying(self):
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            status = client.main(['examples/exe/year_of_birth.so',
+                                  '--target', str(self.root / 'nodir/y.rk'),
+                                  '--socket', self.socket])
+        self.assertEqual(1, status)
+        self.assertIn('[write]', stderr.getvalue())
+
+    def test_keeps_includes_but_not_entry_points(self):
+        main = self.root / 'main.so'
+        main.write_text('>"lib.so"\n')
+        (self.root / 'lib.so').write_text('  nl\n')
+        self.send(client.assemble_request(main, self.root / 'out.rk'))
+
+        self.assertNotIn(main, self.server.files)
+        self.assertIn(self.root / 'lib.so', self.server.files)
+
+    def test_rereads_changed_includes(self):
+        lib = self.root / 'lib.so'
+        main = self.root / 'main.so'
+        main.write_text('>"lib.so"\n')
+        lib.write_text('  nl\n')
+        request = client.assemble_request(main, self.root / 'out.rk')
+
+        self.assertEqual('', self.send(request)['err'])
+        lib.write_text('  bogus\n')
+        self.assertIn('bogus', self.send(request)['err'])
+
+    def test_refuses_a_socket_in_use(self):
+        with self.assertRaises(OSError):
+            Server(self.socket)
@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from morty.Parser import State
+from morty.Template import Template
+from morty.make import SLOT
+from morty.Op import Op
+
+
+class TemplateTest(TestCase):
+    def test_accepts_every_compatible_state(self):
+        template = Template((State.VALUE, State.IDENTIFIER), (Op.PUSH, 0))
+        self.assertTrue(template.accepts((State.STRING, State.IDENTIFIER)))
+        self.assertTrue(template.accepts((State.INTEGER, State.IDENTIFIER)))
+        self.assertFalse(template.accepts((State.INTEGER, State.STRING)))
+        self.assertFalse(template.accepts((State.IDENTIFIER,)))
+
+    def test_merges_constants_around_holes(self):
+        shape = (Op.PUSH, 1, Op.PUSH, 0, Op.ADD, Op.POP, 0)
+        template = Template((State.IDENTIFIER, State.VALUE), shape)
+        self.assertEqual([Op.PUSH, None, Op.PUSH, None, Op.ADD + Op.POP, None],
+                         template.parts)
+
+        slots = [SLOT.pack(3), SLOT.pack(7)]
+        expected = (Op.PUSH + slots[1] + Op.PUSH + slots[0] + Op.ADD
+                    + Op.POP + slots[0])
+        self.assertEqual(expected, template.fill(slots))
+        self.assertEqual(expected, template.fill(slots))
@@ -0,0 +1,73 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from morty import build
+from morty.Watcher import Watcher
+
+
+class WatcherTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.root = Path(self.dir.name)
+        self.main = self.root / 'main.so'
+        self.lib = self.root / 'lib.so'
+        self.lib.write_text('twice:\n  mul n 2 n\n  back\n')
+        self.main.write_text('  jump main\n>"lib.so"\nmain:\n  put 3 n\n'
+                             '  br twice\n  outl n\n')
+        self.watcher = Watcher(self.main, self.root / 'out.rk')
+        self.watcher.CHECKPOINT = 2
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def rebuild(self):
+        report = self.watcher.build(self.watcher.changed())
+        reference = build.assemble(str(self.main), self.root / 'ref.rk')
+        self.assertEqual(reference.err, report.err)
+        if not report.err:
+            self.assertEqual((self.root / 'ref.rk').read_bytes(),
+                             (self.root / 'out.rk').read_bytes())
+        return report
+
+    def edit(self, path, text):
+        path.write_text(text)
+        # Make sure the change is seen even on coarse mtime clocks.
+        stamp = self.watcher.stamps.get(path)
+        if stamp is not None and stamp[1] == len(text.encode()):
+            path.write_text(text + '\n')
+
+    def test_first_build_matches_assemble(self):
+        self.rebuild()
+        self.assertEqual({self.main.absolute(), self.lib.absolute()},
+                         set(self.watcher.stamps))
+
+    def test_nothing_changed(self):
+        self.rebuild()
+        self.assertEqual([], self.watcher.changed())
+
+    def test_edits_match_assemble(self):
+        self.rebuild()
+        self.edit(self.lib, 'twice:\n  mul n 2 n\n  add n 1 n\n  back\n')
+        self.assertEqual([self.lib.absolute()], self.watcher.changed())
+        self.rebuild()
+
+        self.edit(self.main, '  jump main\n>"lib.so"\nmain:\n  put 5 m\n'
+                             '  put 3 n\n  br twice\n  outl n\n  outl m\n')
+        self.rebuild()
+
+        self.edit(self.lib, 'other:\n  back\ntwice:\n  back\n')
+        self.rebuild()
+
+    def test_recovers_from_errors(self):
+        self.rebuild()
+        self.edit(self.lib, 'twice:\n  bogus\n')
+        self.assertIn('[preprocessor]', self.rebuild().err)
+        self.edit(self.lib, 'twice:\n  back\n')
+        self.rebuild()
+
+    def test_dropped_include_is_no_longer_watched(self):
+        self.rebuild()
+        self.edit(self.main, 'main:\n  outl "hi"\n')
+        self.rebuild()
+        self.assertEqual([self.main.absolute()], list(self.watcher.stamps))